@@ -13,6 +13,9 @@ Copy-Item lambda_function.py build/
 
 # Copy predictive scaler module
 Copy-Item ../ml-model/predictive_scaler.py build/
+Copy-Item ../ml-model/drift_tracker.py build/
+Copy-Item ../ml-model/decision_journal.py build/
+Copy-Item ../ml-model/model_registry.py build/
 
 # Install dependencies
 Write-Host "Installing dependencies..." -ForegroundColor Yellow
@@ -14,6 +14,9 @@ cp lambda_function.py build/
 
 # Copy predictive scaler module
 cp ../ml-model/predictive_scaler.py build/
+cp ../ml-model/drift_tracker.py build/
+cp ../ml-model/decision_journal.py build/
+cp ../ml-model/model_registry.py build/
 
 # Install dependencies
 pip install -r requirements.txt -t build/
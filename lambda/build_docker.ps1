@@ -11,6 +11,9 @@ New-Item -ItemType Directory -Path build | Out-Null
 # Copy Lambda function files
 Copy-Item lambda_function.py build/
 Copy-Item ../ml-model/predictive_scaler.py build/
+Copy-Item ../ml-model/drift_tracker.py build/
+Copy-Item ../ml-model/decision_journal.py build/
+Copy-Item ../ml-model/model_registry.py build/
 Copy-Item requirements.txt build/
 
 # Build using Docker with Python 3.11 on Linux
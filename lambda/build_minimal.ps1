@@ -11,6 +11,9 @@ New-Item -ItemType Directory -Path build_minimal | Out-Null
 # Copy only our code files
 Copy-Item lambda_function.py build_minimal/
 Copy-Item ../ml-model/predictive_scaler.py build_minimal/
+Copy-Item ../ml-model/drift_tracker.py build_minimal/
+Copy-Item ../ml-model/decision_journal.py build_minimal/
+Copy-Item ../ml-model/model_registry.py build_minimal/
 
 # Create ZIP package
 Write-Host "Creating ZIP package..." -ForegroundColor Yellow
@@ -1,11 +1,52 @@
 import json
 import os
 import sys
+import time
 
 # Add the current directory to the path for imports
 sys.path.insert(0, os.path.dirname(__file__))
 
 from predictive_scaler import PredictiveScaler
+from decision_journal import journal_from_env
+
+# Kept across warm invocations; records are batched when JOURNAL_BATCH_SIZE > 1
+journal = None
+
+
+def get_journal(scaler):
+    global journal
+    if journal is None:
+        journal = journal_from_env(scaler.s3)
+    return journal
+
+
+def check_drift(scaler, predicted_capacity, record):
+    """
+    Score the forecast and retrain when accuracy has drifted
+
+    Runs after the scaling decision and never raises: a failed retrain
+    must not stop the group from being scaled on the current model.
+    """
+    try:
+        tracker = scaler.track_prediction(predicted_capacity)
+        print(f"Forecast error: {tracker.statistics()}")
+        
+        if tracker.should_retrain() and not scaler.auto_promote:
+            print("Forecast error above threshold - not retraining, MODEL_AUTO_PROMOTE is false")
+        elif tracker.should_retrain():
+            print("Forecast error above threshold - retraining model")
+            trained = False
+            try:
+                trained = scaler.retrain()
+            finally:
+                # Failed attempts start the cooldown too
+                tracker.record_retrain(trained)
+                scaler.save_drift_tracker(tracker)
+            record['retrain'] = 'trained' if trained else 'skipped'
+    except Exception as e:
+        record['retrain'] = 'error'
+        print(f"Error checking forecast drift: {e}")
+
 
 def lambda_handler(event, context):
     """
@@ -15,18 +56,42 @@ def lambda_handler(event, context):
     
     print("Starting predictive scaling execution...")
     
+    started = time.perf_counter()
+    timings = {}
+    record = {'action': 'error'}
+    scaler = None
+    
     try:
         # Initialize the scaler
         scaler = PredictiveScaler()
         
         # Get current capacity
+        phase_start = time.perf_counter()
         current_capacity = scaler.get_current_capacity()
+        timings['capacity'] = (time.perf_counter() - phase_start) * 1000
         print(f"Current capacity: {current_capacity}")
+        if current_capacity:
+            record['current_capacity'] = current_capacity['desired']
         
         # Predict required capacity
+        phase_start = time.perf_counter()
         predicted_capacity = scaler.predict_capacity()
+        timings['predict'] = (time.perf_counter() - phase_start) * 1000
+        record['features'] = scaler.last_features
+        record['features_period'] = scaler.last_features_period
+        record['forecast'] = predicted_capacity
+        record['model_version'] = scaler.model_version
+        record['model_predict_ms'] = scaler.last_predict_ms
+        record['model_load'] = scaler.last_load
+        
+        # Score candidate models on the same features, journaled only
+        if scaler.shadow_models:
+            phase_start = time.perf_counter()
+            record['shadow'] = scaler.shadow_predict()
+            timings['shadow'] = (time.perf_counter() - phase_start) * 1000
         
         if predicted_capacity is None:
+            record['action'] = 'none'
             print("No prediction available - model not trained yet")
             return {
                 'statusCode': 200,
@@ -45,9 +110,18 @@ def lambda_handler(event, context):
         if abs(predicted_capacity - current_desired) >= 1:
             print(f"Scaling from {current_desired} to {predicted_capacity} instances")
             
+            phase_start = time.perf_counter()
             success = scaler.scale_autoscaling_group(predicted_capacity)
+            timings['scale'] = (time.perf_counter() - phase_start) * 1000
             
             if success:
+                record['new_capacity'] = predicted_capacity
+                record['action'] = 'scaled'
+                
+                phase_start = time.perf_counter()
+                record['warm_pool_size'] = scaler.update_warm_pool(predicted_capacity)
+                timings['warm_pool'] = (time.perf_counter() - phase_start) * 1000
+                
                 # Publish to SNS
                 sns_message = {
                     'timestamp': context.aws_request_id,
@@ -56,17 +130,18 @@ def lambda_handler(event, context):
                     'action': 'scaled'
                 }
                 
-                return {
+                response = {
                     'statusCode': 200,
                     'body': json.dumps({
                         'message': 'Successfully scaled Auto Scaling Group',
                         'current_capacity': current_desired,
                         'new_capacity': predicted_capacity,
+                        'warm_pool_size': record['warm_pool_size'],
                         'action': 'scaled'
                     })
                 }
             else:
-                return {
+                response = {
                     'statusCode': 500,
                     'body': json.dumps({
                         'message': 'Failed to scale Auto Scaling Group',
@@ -75,15 +150,30 @@ def lambda_handler(event, context):
                 }
         else:
             print(f"No scaling needed - current: {current_desired}, predicted: {predicted_capacity}")
-            return {
+            record['new_capacity'] = current_desired
+            record['action'] = 'none'
+            
+            phase_start = time.perf_counter()
+            record['warm_pool_size'] = scaler.update_warm_pool(current_desired)
+            timings['warm_pool'] = (time.perf_counter() - phase_start) * 1000
+            
+            response = {
                 'statusCode': 200,
                 'body': json.dumps({
                     'message': 'No scaling needed',
                     'current_capacity': current_desired,
                     'predicted_capacity': predicted_capacity,
+                    'warm_pool_size': record['warm_pool_size'],
                     'action': 'none'
                 })
             }
+        
+        # Retrain only when forecast accuracy has drifted, once scaling is done
+        phase_start = time.perf_counter()
+        check_drift(scaler, predicted_capacity, record)
+        timings['drift'] = (time.perf_counter() - phase_start) * 1000
+        
+        return response
             
     except Exception as e:
         print(f"Error in predictive scaling: {str(e)}")
@@ -97,6 +187,18 @@ def lambda_handler(event, context):
                 'action': 'error'
             })
         }
+    
+    finally:
+        timings['total'] = (time.perf_counter() - started) * 1000
+        if scaler is not None:
+            try:
+                get_journal(scaler).append(
+                    getattr(context, 'aws_request_id', None),
+                    timings=timings,
+                    **record
+                )
+            except Exception as e:
+                print(f"Could not journal decision: {e}")
 
 # For local testing
 if __name__ == "__main__":
@@ -106,3 +208,6 @@ if __name__ == "__main__":
     
     result = lambda_handler({}, MockContext())
     print(json.dumps(result, indent=2))
+    
+    if journal is not None:
+        journal.flush()
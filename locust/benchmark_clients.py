@@ -0,0 +1,135 @@
+# Requests per second per core for the HttpUser and FastHttpUser user classes
+#
+# Runs each user class with zero wait time against a local stub server for a
+# fixed duration and divides the completed requests by the CPU time this
+# process used. The stub runs in separate processes so its CPU is not counted.
+#
+#     python benchmark_clients.py --users 50 --duration 20
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import json
+import multiprocessing
+import socket
+import time
+import gevent
+from gevent.pywsgi import WSGIServer
+from locust import constant
+from locust.env import Environment
+
+import locustfile
+import locustfile_fast
+
+# One body that satisfies every parser in the user classes
+STUB_RESPONSE = json.dumps({
+    "data": {
+        "products": {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"node": {"id": f"UHJvZHVjdDo{i}", "name": f"Product {i}", "slug": f"product-{i}"}} for i in range(20)]
+        },
+        "product": {"variants": [{"id": "UHJvZHVjdFZhcmlhbnQ6MQ=="}]}
+    }
+}).encode()
+
+PAIRS = [
+    (locustfile.SaleorEcommerceUser, locustfile_fast.FastSaleorEcommerceUser),
+    (locustfile.PeakHourUser, locustfile_fast.FastPeakHourUser)
+]
+
+
+def stub_app(environ, start_response):
+    # Drain the request body so keep-alive connections stay usable
+    length = int(environ.get('CONTENT_LENGTH') or 0)
+    if length:
+        environ['wsgi.input'].read(length)
+    start_response('200 OK', [('Content-Type', 'application/json'), ('Content-Length', str(len(STUB_RESPONSE)))])
+    return [STUB_RESPONSE]
+
+
+def serve(listener):
+    WSGIServer(listener, stub_app, log=None).serve_forever()
+
+
+def start_stub_server(processes):
+    """Start the stub on an ephemeral port, returns (url, processes)"""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1024)
+
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=serve, args=(listener,), daemon=True) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+
+    return f"http://127.0.0.1:{listener.getsockname()[1]}", workers
+
+
+def run_user_class(user_class, host, users, duration):
+    """Run user_class with no wait time, returns requests, failures and CPU seconds"""
+    benchmark_class = type(user_class.__name__, (user_class,), {'wait_time': constant(0)})
+    environment = Environment(user_classes=[benchmark_class], host=host)
+    runner = environment.create_local_runner()
+
+    runner.start(users, spawn_rate=users)
+    gevent.sleep(1)  # Let every user finish on_start before measuring
+    environment.stats.reset_all()
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    gevent.sleep(duration)
+    cpu_seconds = time.process_time() - cpu_start
+    wall_seconds = time.perf_counter() - wall_start
+
+    total = environment.stats.total
+    result = {
+        'user_class': user_class.__name__,
+        'client': 'FastHttpUser' if issubclass(user_class, locustfile_fast.FastHttpUser) else 'HttpUser',
+        'requests': total.num_requests,
+        'failures': total.num_failures,
+        'cpu_seconds': cpu_seconds,
+        'rps': total.num_requests / wall_seconds,
+        'rps_per_core': total.num_requests / cpu_seconds if cpu_seconds else None,
+        'p50_ms': total.get_response_time_percentile(0.5),
+        'p95_ms': total.get_response_time_percentile(0.95)
+    }
+
+    runner.quit()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare requests per second per core of HttpUser and FastHttpUser")
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=15, help="Seconds to measure each user class")
+    parser.add_argument('--server-processes', type=int, default=max(multiprocessing.cpu_count() - 1, 1))
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    host, workers = start_stub_server(args.server_processes)
+    locustfile.catalog.refresh_seconds = 0
+
+    results = []
+    try:
+        for slow_class, fast_class in PAIRS:
+            for user_class in (slow_class, fast_class):
+                results.append(run_user_class(user_class, host, args.users, args.duration))
+    finally:
+        for worker in workers:
+            worker.terminate()
+
+    print(f"{'user class':<28}{'client':<14}{'requests':>10}{'rps':>10}{'rps/core':>10}{'p50 ms':>8}{'p95 ms':>8}")
+    for r in results:
+        print(
+            f"{r['user_class']:<28}{r['client']:<14}{r['requests']:>10}{r['rps']:>10.0f}"
+            f"{r['rps_per_core']:>10.0f}{r['p50_ms']:>8.0f}{r['p95_ms']:>8.0f}"
+        )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import os
+import random
+import re
+import time
+import gevent
+import requests
+from gevent.lock import Semaphore
+from popularity import zipf_sampler
+
+
+PRODUCTS_PAGE_QUERY = """
+query getProductsPage($first: Int!, $after: String) {
+    products(first: $first, after: $after) {
+        pageInfo {
+            hasNextPage
+            endCursor
+        }
+        edges {
+            node {
+                id
+                name
+                slug
+            }
+        }
+    }
+}
+"""
+
+
+class ProductCatalog:
+    """
+    Product catalog shared read-only by every user in a worker process
+
+    The first user to start fetches the catalog; users starting at the same
+    time wait for that fetch instead of issuing their own. With
+    refresh_seconds (off by default) a background greenlet refetches it
+    periodically and swaps the new tuple of IDs in, so readers never see a
+    partially built list.
+
+    Fetches go through a plain requests session. The one-off warm-up stays
+    out of Locust's stats unless it fails, which is recorded as a failed
+    "Catalog load"; a background greenlet then retries every retry_seconds
+    until the catalog loads, instead of leaving it empty for the whole run.
+    A refresh pages through the whole catalog again, so each of its pages
+    is recorded as "Catalog refresh" to keep that load on the system under
+    test visible.
+
+    Products and search terms are drawn with Zipf popularity (see
+    popularity.py) so requests spread over the catalog with a long tail,
+    like real shoppers, instead of hitting a small permanently hot set.
+    """
+
+    def __init__(self, page_size=100, max_products=5000, refresh_seconds=0, retry_seconds=10, timeout=30,
+                 zipf_exponent=1.0, popularity_seed=42, base_search_terms=()):
+        self.page_size = page_size
+        self.max_products = max_products
+        self.refresh_seconds = refresh_seconds
+        self.retry_seconds = retry_seconds
+        self.timeout = timeout
+        self.zipf_exponent = zipf_exponent
+        self.popularity_seed = popularity_seed
+        self.base_search_terms = tuple(base_search_terms)
+
+        self.host = None
+        self.events = None
+        self.products = ()
+        self.product_ids = ()
+        self.product_sampler = None
+        self.search_term_sampler = None
+        self.loaded_at = None
+
+        self._lock = Semaphore()
+        self._session = None
+        self._refresher = None
+        self._retrier = None
+
+    def ensure_loaded(self, host, events=None):
+        """
+        Load the catalog once per process, returns the current product IDs
+        Refreshes are recorded through `events` (the environment's events)
+        """
+        self.events = events or self.events
+        if self.loaded_at is None and self._retrier is None:
+            with self._lock:
+                # Another user may have finished loading, or failed to, while we waited
+                if self.loaded_at is None and self._retrier is None:
+                    self.host = host.rstrip('/')
+                    if not self.refresh():
+                        self._retrier = gevent.spawn(self._retry_loop)
+
+        # Restarted after a previous test stopped the refresher
+        if self.refresh_seconds and self._refresher is None:
+            self._refresher = gevent.spawn(self._refresh_loop)
+
+        return self.product_ids
+
+    def _fetch_page(self, variables, record):
+        started = time.perf_counter()
+        response = None
+        exception = None
+        try:
+            response = self._session.post(
+                f"{self.host}/graphql/",
+                json={"query": PRODUCTS_PAGE_QUERY, "variables": variables},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            exception = e
+            raise
+        finally:
+            if record and self.events is not None:
+                self.events.request.fire(
+                    request_type="POST",
+                    name="Catalog refresh",
+                    response_time=(time.perf_counter() - started) * 1000,
+                    response_length=len(response.content) if response is not None else 0,
+                    exception=exception,
+                    context={}
+                )
+
+    def fetch(self, record=False):
+        """Page through the catalog with cursors, returns a tuple of product nodes"""
+        if self._session is None:
+            self._session = requests.Session()
+
+        products = []
+        after = None
+        while len(products) < self.max_products:
+            body = self._fetch_page(
+                {"first": min(self.page_size, self.max_products - len(products)), "after": after},
+                record
+            )
+
+            page = (body.get('data') or {}).get('products')
+            if not page:
+                break
+
+            products.extend(edge['node'] for edge in page['edges'])
+            if not page['pageInfo']['hasNextPage']:
+                break
+            after = page['pageInfo']['endCursor']
+
+        return tuple(products)
+
+    def refresh(self, record=False):
+        """
+        Fetch the catalog and swap it in, keeping the previous one on failure
+
+        A failed first load leaves loaded_at unset and is recorded as a
+        failed "Catalog load" even when pages are not recorded one by one
+        """
+        started = time.perf_counter()
+        try:
+            products = self.fetch(record=record)
+        except Exception as e:
+            print(f"Error loading products: {e}")
+            if self.loaded_at is None and not record and self.events is not None:
+                self.events.request.fire(
+                    request_type="POST",
+                    name="Catalog load",
+                    response_time=(time.perf_counter() - started) * 1000,
+                    response_length=0,
+                    exception=e,
+                    context={}
+                )
+            return False
+
+        if products:
+            product_ids = tuple(product['id'] for product in products)
+            # Build the samplers before publishing anything so readers always
+            # see a matching set of products and samplers
+            product_sampler = zipf_sampler(product_ids, self.zipf_exponent, self.popularity_seed)
+            search_term_sampler = zipf_sampler(
+                search_vocabulary(products, self.base_search_terms), self.zipf_exponent, self.popularity_seed
+            )
+            self.products = products
+            self.product_ids = product_ids
+            self.product_sampler = product_sampler
+            self.search_term_sampler = search_term_sampler
+        self.loaded_at = time.time()
+        return True
+
+    def pick_product_id(self, rng=random):
+        """A product ID drawn by popularity, None while the catalog is empty"""
+        sampler = self.product_sampler
+        return sampler.sample(rng) if sampler is not None else None
+
+    def pick_search_term(self, rng=random):
+        """A search term drawn by popularity, falling back to the base terms"""
+        sampler = self.search_term_sampler
+        if sampler is not None:
+            return sampler.sample(rng)
+        return rng.choice(self.base_search_terms) if self.base_search_terms else None
+
+    def _refresh_loop(self):
+        while True:
+            gevent.sleep(self.refresh_seconds)
+            self.refresh(record=True)
+
+    def _retry_loop(self):
+        while self.loaded_at is None:
+            gevent.sleep(self.retry_seconds)
+            with self._lock:
+                self.refresh()
+        self._retrier = None
+
+    def stop(self):
+        """Stop the background refresh and load retries, e.g. when the test stops"""
+        if self._refresher is not None:
+            self._refresher.kill(block=False)
+            self._refresher = None
+        if self._retrier is not None:
+            self._retrier.kill(block=False)
+            self._retrier = None
+
+
+def search_vocabulary(products, base_terms=()):
+    """Distinct lower-case words from product names, plus the base terms"""
+    terms = dict.fromkeys(base_terms)
+    for product in products:
+        for word in re.findall(r"[a-z]{3,}", product.get('name', '').lower()):
+            terms.setdefault(word)
+    return list(terms)
+
+
+SEARCH_TERMS = [
+    "shirt", "pants", "shoes", "jacket", "dress",
+    "watch", "phone", "laptop", "book", "camera"
+]
+
+# One catalog per worker process
+catalog = ProductCatalog(
+    page_size=int(os.environ.get('CATALOG_PAGE_SIZE', 100)),
+    max_products=int(os.environ.get('CATALOG_MAX_PRODUCTS', 5000)),
+    refresh_seconds=int(os.environ.get('CATALOG_REFRESH_SECONDS', 0)),
+    retry_seconds=int(os.environ.get('CATALOG_RETRY_SECONDS', 10)),
+    zipf_exponent=float(os.environ.get('ZIPF_EXPONENT', 1.0)),
+    popularity_seed=int(os.environ.get('POPULARITY_SEED', 42)),
+    base_search_terms=SEARCH_TERMS
+)
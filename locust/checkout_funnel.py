@@ -0,0 +1,442 @@
+import json
+import os
+import random
+import time
+import uuid
+from locust.runners import MasterRunner, WorkerRunner
+from graphql_requests import JSON_HEADERS, graphql_template
+from latency_histograms import bucket_index, merge_snapshots, percentile
+
+CHECKOUT_FIELDS = """
+        checkout {
+            id
+            token
+            lines {
+                id
+                quantity
+                variant {
+                    id
+                }
+            }
+            shippingMethods {
+                id
+            }
+            totalPrice {
+                gross {
+                    amount
+                    currency
+                }
+            }
+        }
+        errors {
+            field
+            message
+        }
+"""
+
+CHECKOUT_CREATE_BODY = graphql_template("""
+mutation checkoutCreate($channel: String!, $email: String!, $variantId: ID!, $quantity: Int!) {
+    checkoutCreate(input: {channel: $channel, email: $email, lines: [{variantId: $variantId, quantity: $quantity}]}) {%s}
+}
+""" % CHECKOUT_FIELDS)
+
+CHECKOUT_LINES_ADD_BODY = graphql_template("""
+mutation checkoutLinesAdd($id: ID!, $variantId: ID!, $quantity: Int!) {
+    checkoutLinesAdd(id: $id, lines: [{variantId: $variantId, quantity: $quantity}]) {%s}
+}
+""" % CHECKOUT_FIELDS)
+
+CHECKOUT_LINES_UPDATE_BODY = graphql_template("""
+mutation checkoutLinesUpdate($id: ID!, $lineId: ID!, $quantity: Int!) {
+    checkoutLinesUpdate(id: $id, lines: [{lineId: $lineId, quantity: $quantity}]) {%s}
+}
+""" % CHECKOUT_FIELDS)
+
+CHECKOUT_SHIPPING_ADDRESS_BODY = graphql_template("""
+mutation checkoutShippingAddressUpdate($id: ID!, $address: AddressInput!) {
+    checkoutShippingAddressUpdate(id: $id, shippingAddress: $address) {%s}
+}
+""" % CHECKOUT_FIELDS)
+
+CHECKOUT_DELIVERY_METHOD_BODY = graphql_template("""
+mutation checkoutDeliveryMethodUpdate($id: ID!, $deliveryMethodId: ID!) {
+    checkoutDeliveryMethodUpdate(id: $id, deliveryMethodId: $deliveryMethodId) {%s}
+}
+""" % CHECKOUT_FIELDS)
+
+CHECKOUT_BILLING_ADDRESS_BODY = graphql_template("""
+mutation checkoutBillingAddressUpdate($id: ID!, $address: AddressInput!) {
+    checkoutBillingAddressUpdate(id: $id, billingAddress: $address) {%s}
+}
+""" % CHECKOUT_FIELDS)
+
+CHECKOUT_PAYMENT_CREATE_BODY = graphql_template("""
+mutation checkoutPaymentCreate($id: ID!, $gateway: String!, $token: String!, $amount: PositiveDecimal!) {
+    checkoutPaymentCreate(id: $id, input: {gateway: $gateway, token: $token, amount: $amount}) {
+        payment {
+            id
+        }
+        errors {
+            field
+            message
+        }
+    }
+}
+""")
+
+CHECKOUT_COMPLETE_BODY = graphql_template("""
+mutation checkoutComplete($id: ID!) {
+    checkoutComplete(id: $id) {
+        order {
+            id
+        }
+        errors {
+            field
+            message
+        }
+    }
+}
+""")
+
+VIEW_CHECKOUT_BODY = graphql_template("""
+query getCheckout($id: ID!) {
+    checkout(id: $id) {
+        id
+        lines {
+            id
+            quantity
+            variant {
+                product {
+                    name
+                }
+            }
+        }
+        totalPrice {
+            gross {
+                amount
+                currency
+            }
+        }
+    }
+}
+""")
+
+ADDRESS = {
+    "firstName": "Load",
+    "lastName": "Test",
+    "streetAddress1": "1600 Amphitheatre Pkwy",
+    "city": "MOUNTAIN VIEW",
+    "postalCode": "94043",
+    "country": "US",
+    "countryArea": "CA",
+    "phone": "+16502530000"
+}
+
+# Stages after the checkout exists, in funnel order
+STAGES = ['update', 'shipping', 'payment']
+REPORT_ORDER = ['create', 'add'] + STAGES
+
+MESSAGE_TYPE = 'checkout_funnel'
+
+
+def parse_dropoff(value):
+    """Drop-off probability per stage from 'update=0.3,shipping=0.4,payment=0.5'"""
+    dropoff = {}
+    for item in value.split(','):
+        if item.strip():
+            stage, probability = item.split('=')
+            dropoff[stage.strip()] = float(probability)
+    return dropoff
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class FunnelRecorder:
+    """
+    Latency and outcome of each checkout stage, kept apart from request stats
+
+    A stage is several mutations, each already recorded as its own request,
+    so stages are not fired as requests: that would count the mutations
+    twice in Locust's totals, RPS and failure rate, and in the latency
+    histograms and scorecard. Here a stage is one sample in its own HDR
+    histogram (the latency_histograms buckets), failed when the API
+    rejected the checkout, or abandoned when the shopper dropped off.
+    Workers send their stages to the master when the test stops; the local
+    runner or the master writes them to `path` and prints a summary.
+    """
+
+    def __init__(self, path='checkout_funnel.json'):
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.stages = {}
+        self.failed = {}
+        self.abandoned = {}
+        self.worker_snapshots = []
+
+    def record(self, stage, response_time, failed=False):
+        counts = self.stages.setdefault(stage, {})
+        index = bucket_index(int(response_time * 1000))
+        counts[index] = counts.get(index, 0) + 1
+        if failed:
+            self.failed[stage] = self.failed.get(stage, 0) + 1
+
+    def abandon(self, stage):
+        self.abandoned[stage] = self.abandoned.get(stage, 0) + 1
+
+    def snapshot(self):
+        """The stages so far, shaped like a latency_histograms snapshot plus abandonments"""
+        endpoints = {}
+        for stage, counts in self.stages.items():
+            index = sorted(counts)
+            endpoints[stage] = {
+                'count': sum(counts.values()),
+                'errors': self.failed.get(stage, 0),
+                'index': index,
+                'counts': [counts[i] for i in index]
+            }
+        return {'start': self.started, 'end': time.time(), 'endpoints': endpoints, 'abandoned': dict(self.abandoned)}
+
+    def merged(self):
+        merged = self.snapshot()
+        for snapshot in self.worker_snapshots:
+            merge_snapshots(merged, snapshot)
+            for stage, count in snapshot['abandoned'].items():
+                merged['abandoned'][stage] = merged['abandoned'].get(stage, 0) + count
+        return merged
+
+    def report(self, **kwargs):
+        snapshot = self.merged()
+        if not snapshot['endpoints'] and not snapshot['abandoned']:
+            return
+        with open(self.path, 'w') as f:
+            json.dump(snapshot, f)
+        print(format_funnel(snapshot))
+
+    def on_worker_snapshot(self, environment, msg, **kwargs):
+        self.worker_snapshots.append(msg.data)
+
+    def install(self, environment):
+        """Attach to a Locust environment; call from an init event listener"""
+        runner = environment.runner
+        environment.events.test_start.add_listener(lambda **kwargs: self.reset())
+
+        if isinstance(runner, WorkerRunner):
+            environment.events.test_stop.add_listener(
+                lambda **kwargs: runner.send_message(MESSAGE_TYPE, self.snapshot())
+            )
+        elif isinstance(runner, MasterRunner):
+            runner.register_message(MESSAGE_TYPE, self.on_worker_snapshot)
+            environment.events.quitting.add_listener(self.report)
+        else:
+            environment.events.test_stop.add_listener(self.report)
+
+
+def format_funnel(snapshot):
+    lines = [f"{'stage':<10}{'entered':>9}{'failed':>8}{'abandoned':>11}{'p50 ms':>9}{'p95 ms':>9}"]
+    stages = [s for s in REPORT_ORDER if s in snapshot['endpoints'] or s in snapshot['abandoned']]
+    for stage in stages:
+        endpoint = snapshot['endpoints'].get(stage, {'count': 0, 'errors': 0, 'index': [], 'counts': []})
+        p50, p95 = percentile(endpoint, 0.5), percentile(endpoint, 0.95)
+        lines.append(
+            f"{stage:<10}{endpoint['count']:>9}{endpoint['errors']:>8}{snapshot['abandoned'].get(stage, 0):>11}"
+            f"{p50 if p50 is not None else float('nan'):>9.1f}{p95 if p95 is not None else float('nan'):>9.1f}"
+        )
+    return '\n'.join(lines)
+
+
+class CheckoutSession:
+    """
+    One user's checkout, reused until it is completed or abandoned
+
+    add() creates the checkout on first use and adds lines afterwards.
+    advance() moves through update -> shipping -> payment; before each
+    stage the shopper abandons with that stage's drop-off probability.
+    Users that only ever add() abandon their cart after max_adds additions,
+    so a checkout (and every mutation response listing its lines) does not
+    grow for the whole run. Stage latency and outcomes go to `recorder`.
+    """
+
+    def __init__(self, user, dropoff=None, channel='default-channel', gateway='mirumee.payments.dummy',
+                 payment_token='fully-charged', max_adds=5, recorder=None, rng=random):
+        self.user = user
+        self.dropoff = dropoff or {}
+        self.channel = channel
+        self.gateway = gateway
+        self.payment_token = payment_token
+        self.max_adds = max_adds
+        self.recorder = recorder
+        self.rng = rng
+        self.reset()
+
+    def reset(self):
+        self.checkout = None
+        self.next_stage = 0
+        self.adds = 0
+
+    @property
+    def checkout_id(self):
+        return self.checkout['id'] if self.checkout else None
+
+    @property
+    def token(self):
+        return self.checkout['token'] if self.checkout else None
+
+    def _mutate(self, body, field, name):
+        with self.user.client.post(
+            "/graphql/", data=body, headers=JSON_HEADERS, name=name, catch_response=True
+        ) as response:
+            # Accept 400 errors as valid for infrastructure testing
+            if response.status_code in [200, 400]:
+                response.success()
+        if response.status_code != 200:
+            raise CheckoutError(f"{name}: HTTP {response.status_code}")
+
+        try:
+            result = (response.json().get('data') or {}).get(field)
+        except ValueError:
+            raise CheckoutError(f"{name}: response is not JSON")
+        if not result:
+            raise CheckoutError(f"{name}: no {field} in response")
+        if result.get('errors'):
+            raise CheckoutError(f"{name}: {result['errors'][0].get('message')}")
+
+        if result.get('checkout'):
+            self.checkout = result['checkout']
+        return result
+
+    def _run_stage(self, stage, steps):
+        start = time.perf_counter()
+        failed = False
+        try:
+            steps()
+        except CheckoutError:
+            failed = True
+            # A checkout the API rejected cannot be continued
+            self.reset()
+
+        if self.recorder is not None:
+            self.recorder.record(stage, (time.perf_counter() - start) * 1000, failed)
+        return not failed
+
+    def _abandon(self, stage):
+        self.reset()
+        if self.recorder is not None:
+            self.recorder.abandon(stage)
+
+    def add(self, variant_id, quantity=1):
+        """Create the checkout with this line, or add the line to the existing one"""
+        if self.checkout is not None and self.adds >= self.max_adds:
+            self._abandon('add')
+
+        self.adds += 1
+        if self.checkout is None:
+            email = f"loadtest+{uuid.uuid4().hex[:12]}@example.com"
+            return self._run_stage('create', lambda: self._mutate(
+                CHECKOUT_CREATE_BODY({
+                    "channel": self.channel, "email": email, "variantId": variant_id, "quantity": quantity
+                }),
+                'checkoutCreate', "GraphQL: Checkout Create"
+            ))
+
+        return self._run_stage('add', lambda: self._mutate(
+            CHECKOUT_LINES_ADD_BODY({"id": self.checkout_id, "variantId": variant_id, "quantity": quantity}),
+            'checkoutLinesAdd', "GraphQL: Checkout Lines Add"
+        ))
+
+    def view(self):
+        """Read the checkout back, None if there is no checkout yet"""
+        if self.checkout is None:
+            return None
+        return self.user.client.post(
+            "/graphql/",
+            data=VIEW_CHECKOUT_BODY({"id": self.checkout_id}),
+            headers=JSON_HEADERS,
+            name="GraphQL: View Cart"
+        )
+
+    def advance(self):
+        """Run the next funnel stage, returns the stage name or None if nothing ran"""
+        if self.checkout is None:
+            return None
+
+        stage = STAGES[self.next_stage]
+        if self.rng.random() < self.dropoff.get(stage, 0.0):
+            self._abandon(stage)
+            return None
+
+        steps = {
+            'update': self._update_lines,
+            'shipping': self._shipping,
+            'payment': self._payment
+        }[stage]
+
+        if self._run_stage(stage, steps) and self.checkout is not None:
+            self.next_stage += 1
+            if self.next_stage == len(STAGES):
+                # Order placed, the next add() starts a new checkout
+                self.reset()
+        return stage
+
+    def _update_lines(self):
+        lines = self.checkout.get('lines') or []
+        if not lines:
+            raise CheckoutError("Checkout has no lines")
+        line = self.rng.choice(lines)
+        self._mutate(
+            CHECKOUT_LINES_UPDATE_BODY({"id": self.checkout_id, "lineId": line['id'], "quantity": self.rng.randint(1, 3)}),
+            'checkoutLinesUpdate', "GraphQL: Checkout Lines Update"
+        )
+
+    def _shipping(self):
+        self._mutate(
+            CHECKOUT_SHIPPING_ADDRESS_BODY({"id": self.checkout_id, "address": ADDRESS}),
+            'checkoutShippingAddressUpdate', "GraphQL: Checkout Shipping Address"
+        )
+        methods = self.checkout.get('shippingMethods') or []
+        if not methods:
+            raise CheckoutError("No shipping methods available")
+        self._mutate(
+            CHECKOUT_DELIVERY_METHOD_BODY({"id": self.checkout_id, "deliveryMethodId": methods[0]['id']}),
+            'checkoutDeliveryMethodUpdate', "GraphQL: Checkout Delivery Method"
+        )
+
+    def _payment(self):
+        self._mutate(
+            CHECKOUT_BILLING_ADDRESS_BODY({"id": self.checkout_id, "address": ADDRESS}),
+            'checkoutBillingAddressUpdate', "GraphQL: Checkout Billing Address"
+        )
+        amount = ((self.checkout.get('totalPrice') or {}).get('gross') or {}).get('amount')
+        if amount is None:
+            raise CheckoutError("Checkout has no total price")
+        self._mutate(
+            CHECKOUT_PAYMENT_CREATE_BODY({
+                "id": self.checkout_id, "gateway": self.gateway, "token": self.payment_token, "amount": amount
+            }),
+            'checkoutPaymentCreate', "GraphQL: Checkout Payment Create"
+        )
+        self._mutate(
+            CHECKOUT_COMPLETE_BODY({"id": self.checkout_id}),
+            'checkoutComplete', "GraphQL: Checkout Complete"
+        )
+
+
+def session_for(user):
+    """A CheckoutSession configured from the environment"""
+    return CheckoutSession(
+        user,
+        dropoff=parse_dropoff(os.environ.get('CHECKOUT_DROPOFF', 'update=0.3,shipping=0.4,payment=0.5')),
+        channel=os.environ.get('CHECKOUT_CHANNEL', 'default-channel'),
+        gateway=os.environ.get('CHECKOUT_PAYMENT_GATEWAY', 'mirumee.payments.dummy'),
+        payment_token=os.environ.get('CHECKOUT_PAYMENT_TOKEN', 'fully-charged'),
+        max_adds=int(os.environ.get('CHECKOUT_MAX_ADDS', 5)),
+        recorder=funnel
+    )
+
+
+# One funnel recorder per process
+funnel = FunnelRecorder(path=os.environ.get('CHECKOUT_FUNNEL_FILE', 'checkout_funnel.json'))
@@ -0,0 +1,21 @@
+import json
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def graphql_body(query):
+    """Serialize a GraphQL request without variables once, at import time"""
+    return json.dumps({"query": query}).encode()
+
+
+def graphql_template(query):
+    """
+    Pre-serialize a GraphQL query that takes variables
+    Returns a function that only has to encode the variables per request
+    """
+    prefix = json.dumps({"query": query})[:-1].encode() + b', "variables": '
+
+    def body(variables):
+        return prefix + json.dumps(variables).encode() + b'}'
+
+    return body
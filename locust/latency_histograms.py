@@ -0,0 +1,233 @@
+import json
+import os
+import time
+import gevent
+from locust.runners import MasterRunner, WorkerRunner
+
+# Log-linear (HDR style) buckets over integer microseconds: values below
+# 2**SUB_BUCKET_BITS get one bucket each, every power of two above that is
+# split into 2**(SUB_BUCKET_BITS - 1) buckets, so the error stays under 1/64.
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_VALUE_US = (1 << 32) - 1  # ~71 minutes
+BUCKET_COUNT = ((MAX_VALUE_US.bit_length() - SUB_BUCKET_BITS) << (SUB_BUCKET_BITS - 1)) + SUB_BUCKETS
+
+MESSAGE_TYPE = 'latency_histograms'
+
+
+def bucket_index(value_us):
+    """Bucket holding a latency in integer microseconds"""
+    if value_us < SUB_BUCKETS:
+        return value_us
+    value_us = min(value_us, MAX_VALUE_US)
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value_us >> shift)
+
+
+def bucket_value(index):
+    """Midpoint, in microseconds, of the values that land in a bucket"""
+    if index < SUB_BUCKETS:
+        return index
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    return ((index - (shift << (SUB_BUCKET_BITS - 1))) << shift) + ((1 << shift) >> 1)
+
+
+def percentile(snapshot_endpoint, q):
+    """Latency in milliseconds at quantile q (0-1) of one endpoint in a snapshot"""
+    total = snapshot_endpoint['count']
+    if not total:
+        return None
+
+    rank = max(1, int(q * total + 0.5))
+    seen = 0
+    for index, count in zip(snapshot_endpoint['index'], snapshot_endpoint['counts']):
+        seen += count
+        if seen >= rank:
+            return bucket_value(index) / 1000
+    return bucket_value(snapshot_endpoint['index'][-1]) / 1000
+
+
+def merge_snapshots(target, source):
+    """Add the endpoints of source into target (snapshots of the same interval)"""
+    for name, endpoint in source['endpoints'].items():
+        merged = target['endpoints'].get(name)
+        if merged is None:
+            target['endpoints'][name] = {k: list(v) if isinstance(v, list) else v for k, v in endpoint.items()}
+            continue
+
+        counts = dict(zip(merged['index'], merged['counts']))
+        for index, count in zip(endpoint['index'], endpoint['counts']):
+            counts[index] = counts.get(index, 0) + count
+        merged['index'] = sorted(counts)
+        merged['counts'] = [counts[i] for i in merged['index']]
+        merged['count'] += endpoint['count']
+        merged['errors'] += endpoint['errors']
+
+    target['end'] = max(target['end'], source['end'])
+    return target
+
+
+def read_histograms(path):
+    """Read every interval snapshot from a histogram file, oldest first"""
+    with open(path) as f:
+        snapshots = [json.loads(line) for line in f if line.strip()]
+    return sorted(snapshots, key=lambda s: s['start'])
+
+
+class LatencyRecorder:
+    """
+    Per-endpoint latency histograms recorded from Locust's request event
+
+    record() is the request listener: a dict lookup, a few integer operations
+    and a list increment. Every `interval` seconds (aligned to wall clock, so
+    workers' intervals line up) the histograms are swapped for empty ones and
+    the old ones become a sparse snapshot. Local runs append snapshots to
+    `path`; workers send them to the master, which merges and writes them.
+    """
+
+    def __init__(self, interval=10, path='latency_histograms.jsonl'):
+        self.interval = interval
+        self.path = path
+        self.histograms = {}
+        self.errors = {}
+        self.interval_start = self._aligned(time.time())
+
+        self.environment = None
+        self.pending = {}  # master only: interval start -> merged snapshot
+        self._greenlet = None
+
+    def _aligned(self, timestamp):
+        return timestamp - timestamp % self.interval
+
+    def record(self, request_type, name, response_time, response_length, exception=None, **kwargs):
+        counts = self.histograms.get(name)
+        if counts is None:
+            counts = self.histograms[name] = [0] * BUCKET_COUNT
+
+        value = int(response_time * 1000)
+        if value >= SUB_BUCKETS:
+            if value > MAX_VALUE_US:
+                value = MAX_VALUE_US
+            shift = value.bit_length() - SUB_BUCKET_BITS
+            value = (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+        counts[value] += 1
+
+        if exception is not None:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def rotate(self, now=None):
+        """Swap in empty histograms and return the finished interval as a snapshot"""
+        now = now if now is not None else time.time()
+        histograms, errors = self.histograms, self.errors
+        self.histograms, self.errors = {}, {}
+
+        snapshot = {'start': self.interval_start, 'end': now, 'endpoints': {}}
+        # The rotation greenlet may wake a hair before the boundary
+        self.interval_start = max(self._aligned(now), self.interval_start + self.interval)
+
+        for name, counts in histograms.items():
+            index = [i for i, c in enumerate(counts) if c]
+            snapshot['endpoints'][name] = {
+                'count': sum(counts),
+                'errors': errors.get(name, 0),
+                'index': index,
+                'counts': [counts[i] for i in index]
+            }
+        return snapshot
+
+    def write(self, snapshot):
+        if not snapshot['endpoints']:
+            return
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(snapshot, separators=(',', ':')) + '\n')
+
+    def flush(self):
+        """Rotate and hand the finished interval to the file or the master"""
+        snapshot = self.rotate()
+        if isinstance(self.environment.runner, WorkerRunner):
+            self.environment.runner.send_message(MESSAGE_TYPE, snapshot)
+        else:
+            self.write(snapshot)
+
+    def on_worker_snapshot(self, environment, msg, **kwargs):
+        snapshot = msg.data
+        merged = self.pending.get(snapshot['start'])
+        if merged is None:
+            self.pending[snapshot['start']] = snapshot
+        else:
+            merge_snapshots(merged, snapshot)
+
+    def write_pending(self, before=None):
+        """Master: write merged intervals that started before `before` (all if None)"""
+        for start in sorted(self.pending):
+            if before is None or start < before:
+                self.write(self.pending.pop(start))
+
+    def _rotate_loop(self):
+        while True:
+            gevent.sleep(self.interval_start + self.interval - time.time())
+            self.flush()
+
+    def _master_loop(self):
+        while True:
+            gevent.sleep(self.interval)
+            # Give workers one full interval to report before writing
+            self.write_pending(before=self._aligned(time.time()) - self.interval)
+
+    def install(self, environment):
+        """Attach to a Locust environment; call from an init event listener"""
+        self.environment = environment
+        runner = environment.runner
+
+        if isinstance(runner, MasterRunner):
+            runner.register_message(MESSAGE_TYPE, self.on_worker_snapshot)
+            environment.events.test_start.add_listener(lambda **kwargs: self.start(self._master_loop))
+            environment.events.quitting.add_listener(lambda **kwargs: self.write_pending())
+        else:
+            environment.events.request.add_listener(self.record)
+            environment.events.test_start.add_listener(lambda **kwargs: self.start(self._rotate_loop))
+
+        environment.events.test_stop.add_listener(self.stop)
+
+    def start(self, loop):
+        if self._greenlet is None:
+            self.histograms, self.errors = {}, {}
+            self.interval_start = self._aligned(time.time())
+            self._greenlet = gevent.spawn(loop)
+
+    def stop(self, **kwargs):
+        if self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+        if isinstance(self.environment.runner, MasterRunner):
+            self.write_pending(before=self._aligned(time.time()) - self.interval)
+        else:
+            self.flush()
+
+
+recorder = LatencyRecorder(
+    interval=float(os.environ.get('LATENCY_HISTOGRAM_INTERVAL', 10)),
+    path=os.environ.get('LATENCY_HISTOGRAM_FILE', 'latency_histograms.jsonl')
+)
+
+
+if __name__ == "__main__":
+    # Per-request cost of the listener on top of an empty one, both called the way Locust fires events
+    import random
+    samples = [random.lognormvariate(4, 1) for _ in range(200000)]
+    names = ["GraphQL: Browse Products", "GraphQL: View Product Detail", "Browse Homepage"]
+
+    def empty_listener(request_type, name, response_time, response_length, exception=None, **kwargs):
+        pass
+
+    def time_listener(listener):
+        start = time.perf_counter()
+        for i, response_time in enumerate(samples):
+            listener(request_type="POST", name=names[i % 3], response_time=response_time,
+                     response_length=100, exception=None, context={})
+        return (time.perf_counter() - start) / len(samples) * 1e9
+
+    baseline = min(time_listener(empty_listener) for _ in range(3))
+    recording = min(time_listener(LatencyRecorder().record) for _ in range(3))
+    print(f"empty listener: {baseline:.0f} ns, recording listener: {recording:.0f} ns")
+    print(f"recording overhead: {recording - baseline:.0f} ns per request")
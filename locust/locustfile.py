@@ -2,12 +2,138 @@ from locust import HttpUser, task, between, events
 import random
 import json
 from datetime import datetime
+from catalog_cache import catalog
+import checkout_funnel
+from checkout_funnel import session_for
+import latency_histograms
+import scale_scorecard
+from graphql_requests import JSON_HEADERS, graphql_body, graphql_template
 
-# Event handler to mark 400 responses as successful for infrastructure testing
-@events.request.add_listener
-def mark_400_as_success(request_type, name, response_time, response_length, exception, **kwargs):
-    """Mark HTTP 400 as success since we're testing infrastructure, not application logic"""
-    pass  # Locust will handle this via catch_response in tasks
+BROWSE_PRODUCTS_BODY = graphql_body("""
+query {
+    products(first: 10) {
+        edges {
+            node {
+                id
+                name
+                slug
+                thumbnail {
+                    url
+                }
+                pricing {
+                    priceRange {
+                        start {
+                            gross {
+                                amount
+                                currency
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+""")
+
+PRODUCT_DETAIL_BODY = graphql_template("""
+query getProduct($id: ID!) {
+    product(id: $id) {
+        id
+        name
+        description
+        slug
+        category {
+            name
+        }
+        pricing {
+            priceRange {
+                start {
+                    gross {
+                        amount
+                        currency
+                    }
+                }
+            }
+        }
+        images {
+            url
+        }
+        variants {
+            id
+            name
+            pricing {
+                price {
+                    gross {
+                        amount
+                        currency
+                    }
+                }
+            }
+        }
+    }
+}
+""")
+
+SEARCH_PRODUCTS_BODY = graphql_template("""
+query searchProducts($search: String!) {
+    products(first: 10, filter: {search: $search}) {
+        edges {
+            node {
+                id
+                name
+                slug
+            }
+        }
+    }
+}
+""")
+
+PRODUCT_VARIANTS_BODY = graphql_template("""
+query getProduct($id: ID!) {
+    product(id: $id) {
+        variants {
+            id
+        }
+    }
+}
+""")
+
+BROWSE_CATEGORIES_BODY = graphql_body("""
+query {
+    categories(first: 10) {
+        edges {
+            node {
+                id
+                name
+                slug
+                products(first: 5) {
+                    edges {
+                        node {
+                            id
+                            name
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+""")
+
+# HTTP 400 responses are marked as successful via catch_response in the tasks,
+# since we're testing infrastructure, not application logic
+
+@events.init.add_listener
+def on_locust_init(environment, **kwargs):
+    """
+    Record per-endpoint latency histograms, flushed every LATENCY_HISTOGRAM_INTERVAL
+    seconds, score how capacity kept up with them when the test stops, and
+    report each checkout stage separately from the request stats
+    """
+    latency_histograms.recorder.install(environment)
+    scale_scorecard.scorecard.install(environment)
+    checkout_funnel.funnel.install(environment)
 
 class SaleorEcommerceUser(HttpUser):
     """
@@ -19,43 +145,18 @@ class SaleorEcommerceUser(HttpUser):
     
     def on_start(self):
         """Initialize user session"""
-        self.product_ids = []
-        self.cart_token = None
-        self.load_products()
+        self.checkout = session_for(self)
+        catalog.ensure_loaded(self.host, self.environment.events)
     
-    def load_products(self):
-        """Load some product IDs for testing"""
-        # GraphQL query to get products
-        query = """
-        query {
-            products(first: 20) {
-                edges {
-                    node {
-                        id
-                        name
-                        slug
-                    }
-                }
-            }
-        }
-        """
-        
-        try:
-            response = self.client.post(
-                "/graphql/",
-                json={"query": query},
-                name="GraphQL: Get Products"
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'data' in data and 'products' in data['data']:
-                    self.product_ids = [
-                        edge['node']['id'] 
-                        for edge in data['data']['products']['edges']
-                    ]
-        except Exception as e:
-            print(f"Error loading products: {e}")
+    @property
+    def cart_token(self):
+        """Token of this user's checkout, None until something is added to the cart"""
+        return self.checkout.token
+    
+    @property
+    def product_ids(self):
+        """Product IDs from the catalog shared by every user in this worker"""
+        return catalog.product_ids
     
     @task(10)
     def browse_homepage(self):
@@ -68,36 +169,10 @@ class SaleorEcommerceUser(HttpUser):
     @task(8)
     def browse_products(self):
         """Browse product listings"""
-        query = """
-        query {
-            products(first: 10) {
-                edges {
-                    node {
-                        id
-                        name
-                        slug
-                        thumbnail {
-                            url
-                        }
-                        pricing {
-                            priceRange {
-                                start {
-                                    gross {
-                                        amount
-                                        currency
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        
         with self.client.post(
             "/graphql/",
-            json={"query": query},
+            data=BROWSE_PRODUCTS_BODY,
+            headers=JSON_HEADERS,
             name="GraphQL: Browse Products",
             catch_response=True
         ) as response:
@@ -108,117 +183,41 @@ class SaleorEcommerceUser(HttpUser):
     @task(6)
     def view_product_detail(self):
         """View a specific product"""
-        if not self.product_ids:
+        product_id = catalog.pick_product_id()
+        if product_id is None:
             return
         
-        product_id = random.choice(self.product_ids)
-        
-        query = """
-        query getProduct($id: ID!) {
-            product(id: $id) {
-                id
-                name
-                description
-                slug
-                category {
-                    name
-                }
-                pricing {
-                    priceRange {
-                        start {
-                            gross {
-                                amount
-                                currency
-                            }
-                        }
-                    }
-                }
-                images {
-                    url
-                }
-                variants {
-                    id
-                    name
-                    pricing {
-                        price {
-                            gross {
-                                amount
-                                currency
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        
         self.client.post(
             "/graphql/",
-            json={
-                "query": query,
-                "variables": {"id": product_id}
-            },
+            data=PRODUCT_DETAIL_BODY({"id": product_id}),
+            headers=JSON_HEADERS,
             name="GraphQL: View Product Detail"
         )
     
     @task(4)
     def search_products(self):
         """Search for products"""
-        search_terms = [
-            "shirt", "pants", "shoes", "jacket", "dress",
-            "watch", "phone", "laptop", "book", "camera"
-        ]
-        
-        search_term = random.choice(search_terms)
-        
-        query = """
-        query searchProducts($search: String!) {
-            products(first: 10, filter: {search: $search}) {
-                edges {
-                    node {
-                        id
-                        name
-                        slug
-                    }
-                }
-            }
-        }
-        """
+        search_term = catalog.pick_search_term()
         
         self.client.post(
             "/graphql/",
-            json={
-                "query": query,
-                "variables": {"search": search_term}
-            },
+            data=SEARCH_PRODUCTS_BODY({"search": search_term}),
+            headers=JSON_HEADERS,
             name="GraphQL: Search Products"
         )
     
     @task(3)
     def add_to_cart(self):
         """Add product to cart"""
-        if not self.product_ids:
+        product_id = catalog.pick_product_id()
+        if product_id is None:
             return
         
-        product_id = random.choice(self.product_ids)
-        
         # First get product variants
-        query = """
-        query getProduct($id: ID!) {
-            product(id: $id) {
-                variants {
-                    id
-                }
-            }
-        }
-        """
-        
         response = self.client.post(
             "/graphql/",
-            json={
-                "query": query,
-                "variables": {"id": product_id}
-            },
+            data=PRODUCT_VARIANTS_BODY({"id": product_id}),
+            headers=JSON_HEADERS,
             name="GraphQL: Get Product Variants"
         )
         
@@ -233,99 +232,21 @@ class SaleorEcommerceUser(HttpUser):
             
             variant_id = variants[0]['id']
             
-            # Add to cart
-            mutation = """
-            mutation addToCart($variantId: ID!, $quantity: Int!) {
-                checkoutLinesAdd(
-                    lines: [{variantId: $variantId, quantity: $quantity}]
-                ) {
-                    checkout {
-                        id
-                        lines {
-                            id
-                        }
-                    }
-                    errors {
-                        message
-                    }
-                }
-            }
-            """
-            
-            self.client.post(
-                "/graphql/",
-                json={
-                    "query": mutation,
-                    "variables": {
-                        "variantId": variant_id,
-                        "quantity": random.randint(1, 3)
-                    }
-                },
-                name="GraphQL: Add to Cart"
-            )
+            # Creates the checkout on the first add, reuses it afterwards
+            self.checkout.add(variant_id, random.randint(1, 3))
     
     @task(2)
     def view_cart(self):
         """View shopping cart"""
-        query = """
-        query {
-            me {
-                checkout {
-                    id
-                    lines {
-                        id
-                        quantity
-                        variant {
-                            product {
-                                name
-                            }
-                        }
-                    }
-                    totalPrice {
-                        gross {
-                            amount
-                            currency
-                        }
-                    }
-                }
-            }
-        }
-        """
-        
-        self.client.post(
-            "/graphql/",
-            json={"query": query},
-            name="GraphQL: View Cart"
-        )
+        self.checkout.view()
     
     @task(5)
     def browse_categories(self):
         """Browse product categories"""
-        query = """
-        query {
-            categories(first: 10) {
-                edges {
-                    node {
-                        id
-                        name
-                        slug
-                        products(first: 5) {
-                            edges {
-                                node {
-                                    id
-                                    name
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        
         self.client.post(
             "/graphql/",
-            json={"query": query},
+            data=BROWSE_CATEGORIES_BODY,
+            headers=JSON_HEADERS,
             name="GraphQL: Browse Categories"
         )
 
@@ -345,30 +266,8 @@ class PeakHourUser(SaleorEcommerceUser):
     
     @task(5)
     def checkout_attempt(self):
-        """Attempt to proceed to checkout"""
-        query = """
-        query {
-            me {
-                checkout {
-                    id
-                    availablePaymentGateways {
-                        id
-                        name
-                    }
-                    availableShippingMethods {
-                        id
-                        name
-                    }
-                }
-            }
-        }
-        """
-        
-        self.client.post(
-            "/graphql/",
-            json={"query": query},
-            name="GraphQL: Checkout Attempt"
-        )
+        """Move the cart one step further through the checkout funnel"""
+        self.checkout.advance()
 
 
 @events.test_start.add_listener
@@ -381,4 +280,5 @@ def on_test_start(environment, **kwargs):
 @events.test_stop.add_listener
 def on_test_stop(environment, **kwargs):
     """Hook that runs when the load test stops"""
+    catalog.stop()
     print(f"Load test completed at {datetime.now()}")
@@ -0,0 +1,38 @@
+from locust import FastHttpUser
+import locustfile as base
+
+# Only the module is imported so Locust does not also pick up the
+# requests-based user classes from this file.
+
+
+class FastSaleorEcommerceUser(FastHttpUser):
+    """
+    SaleorEcommerceUser on Locust's geventhttpclient-based FastHttpUser
+    Runs the same task functions with the same weights and wait time
+    """
+
+    wait_time = base.SaleorEcommerceUser.wait_time
+    tasks = base.SaleorEcommerceUser.tasks
+
+    on_start = base.SaleorEcommerceUser.on_start
+    product_ids = base.SaleorEcommerceUser.product_ids
+
+
+class FastHighTrafficUser(FastSaleorEcommerceUser):
+    """
+    HighTrafficUser on FastHttpUser
+    """
+    wait_time = base.HighTrafficUser.wait_time
+
+
+class FastPeakHourUser(FastHttpUser):
+    """
+    PeakHourUser on FastHttpUser, including the checkout attempts
+    """
+    # Not derived from FastSaleorEcommerceUser: Locust would add that class's
+    # tasks on top of PeakHourUser.tasks, which already contains them
+    wait_time = base.PeakHourUser.wait_time
+    tasks = base.PeakHourUser.tasks
+
+    on_start = base.PeakHourUser.on_start
+    product_ids = base.PeakHourUser.product_ids
@@ -0,0 +1,62 @@
+import random
+
+
+def zipf_weights(n, exponent=1.0):
+    """Weight of rank r (1-based) is 1 / r**exponent; exponent 0 is uniform"""
+    return [1.0 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+class AliasSampler:
+    """
+    Samples items with arbitrary fixed weights in O(1) (Vose's alias method)
+
+    Building the tables is O(n) and happens once per catalog refresh; each
+    sample is one random index and one biased coin flip.
+    """
+
+    def __init__(self, items, weights):
+        if len(items) != len(weights) or not items:
+            raise ValueError("AliasSampler needs the same, non-zero number of items and weights")
+
+        self.items = tuple(items)
+        n = len(self.items)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+
+        self.probability = [0.0] * n
+        self.alias = [0] * n
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        # Whatever is left is 1.0 up to floating point error
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def __len__(self):
+        return len(self.items)
+
+    def sample(self, rng=random):
+        column = int(rng.random() * len(self.items))
+        if rng.random() < self.probability[column]:
+            return self.items[column]
+        return self.items[self.alias[column]]
+
+
+def zipf_sampler(items, exponent=1.0, seed=None):
+    """
+    Alias sampler that gives items Zipf popularity
+
+    Items are shuffled with `seed` before ranks are assigned, so the hot set
+    is not simply the first page the API returned, yet stays the same across
+    workers and refreshes that use the same seed.
+    """
+    ranked = list(items)
+    random.Random(seed).shuffle(ranked)
+    return AliasSampler(ranked, zipf_weights(len(ranked), exponent))
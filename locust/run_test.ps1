@@ -36,6 +36,17 @@ switch ($Scenario) {
         locust -f locustfile.py -f traffic_patterns.py --host=$TargetHost --shape=FlashSaleShape --headless
     }
     
+    "replay" {
+        Write-Host "Replaying recorded traffic from $env:TRACE_FILE..." -ForegroundColor Yellow
+        locust -f locustfile.py -f traffic_patterns.py --host=$TargetHost --shape=TraceReplayShape --headless
+    }
+    
+    "composed" {
+        if (-not $env:SHAPE_FILE) { $env:SHAPE_FILE = "shapes/flash_sale_on_daily_cycle.json" }
+        Write-Host "Running composed shape from $env:SHAPE_FILE..." -ForegroundColor Yellow
+        locust -f locustfile.py -f traffic_patterns.py --host=$TargetHost --shape=ComposedShape --headless
+    }
+    
     "web" {
         Write-Host "Starting Locust web UI..." -ForegroundColor Yellow
         Write-Host "Access the UI at http://localhost:8089" -ForegroundColor Cyan
@@ -44,7 +55,7 @@ switch ($Scenario) {
     
     default {
         Write-Host "Unknown scenario: $Scenario" -ForegroundColor Red
-        Write-Host "Available scenarios: baseline, surge, sinusoidal, step, flash-sale, web" -ForegroundColor Yellow
+        Write-Host "Available scenarios: baseline, surge, sinusoidal, step, flash-sale, replay, composed, web" -ForegroundColor Yellow
         exit 1
     }
 }
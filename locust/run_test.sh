@@ -35,6 +35,17 @@ case $SCENARIO in
         locust -f locustfile.py -f traffic_patterns.py --host=$HOST --shape=FlashSaleShape --headless
         ;;
     
+    replay)
+        echo "Replaying recorded traffic from ${TRACE_FILE}..."
+        locust -f locustfile.py -f traffic_patterns.py --host=$HOST --shape=TraceReplayShape --headless
+        ;;
+    
+    composed)
+        export SHAPE_FILE="${SHAPE_FILE:-shapes/flash_sale_on_daily_cycle.json}"
+        echo "Running composed shape from ${SHAPE_FILE}..."
+        locust -f locustfile.py -f traffic_patterns.py --host=$HOST --shape=ComposedShape --headless
+        ;;
+    
     web)
         echo "Starting Locust web UI..."
         echo "Access the UI at http://localhost:8089"
@@ -43,7 +54,7 @@ case $SCENARIO in
     
     *)
         echo "Unknown scenario: $SCENARIO"
-        echo "Available scenarios: baseline, surge, sinusoidal, step, flash-sale, web"
+        echo "Available scenarios: baseline, surge, sinusoidal, step, flash-sale, replay, composed, web"
         exit 1
         ;;
 esac
@@ -0,0 +1,528 @@
+# Scale-lag scorecard: how fast capacity caught up with each surge of a load test
+#
+# Built when the test stops from three per-second timelines:
+# - users: the user count the shape asked for, sampled every second
+# - capacity: InService instances from a CapacitySource (the Auto Scaling
+#   API, a recorded file, or a simulated reactive scaler)
+# - latency: the per-endpoint histograms written by latency_histograms
+#
+# Compare a run against a stored baseline to catch predictor regressions:
+#
+#     python scale_scorecard.py compare scale_scorecard.json baseline.json --tolerance 0.1
+#
+# Only the asg and file sources reflect what the predictor did. The simulated
+# source never consults it, so its scorecards are a reference baseline (what
+# a reactive scaler would have done) and cannot be the run being compared.
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+import gevent
+from locust.runners import MasterRunner, WorkerRunner
+from shape_dsl import to_seconds
+import latency_histograms
+
+# Metrics compared against the baseline, with the absolute change that is
+# always tolerated (histogram intervals and minutes are coarse)
+REGRESSION_METRICS = {
+    'slo_violating_seconds': 10,
+    'max_time_to_capacity': 10,
+    'over_provisioned_instance_minutes': 1.0
+}
+
+# Endpoints that are not requests to the system under test: earlier versions
+# of checkout_funnel recorded whole checkout stages under these names, and
+# histogram files are appended to across runs
+EXCLUDED_ENDPOINT_PREFIXES = ('Checkout stage:',)
+
+
+def step_series(points, start, seconds):
+    """Sample (timestamp, value) points as a step function at start + 0..seconds-1"""
+    points = sorted(points)
+    if not points:
+        return [0] * seconds
+
+    values = []
+    current = points[0][1]  # Before the first point, assume the first value held
+    i = 0
+    for second in range(seconds):
+        while i < len(points) and points[i][0] <= start + second:
+            current = points[i][1]
+            i += 1
+        values.append(current)
+    return values
+
+
+class RecordedCapacity:
+    """
+    Capacity recorded in a file: a JSON list of {"Timestamp": ..., "InService": n}
+    or CSV timestamp,in_service rows. Timestamps are ISO 8601 or epoch seconds.
+    """
+
+    kind = 'file'
+    interval = None
+
+    def __init__(self, path):
+        self.path = path
+
+    def sample(self, now):
+        pass
+
+    def load(self):
+        if self.path.endswith('.csv'):
+            with open(self.path, newline='') as f:
+                rows = [row for row in csv.reader(f) if row and not row[0].startswith('#')]
+            if rows and not rows[0][1].strip().isdigit():
+                rows = rows[1:]  # Header
+            return [(to_seconds(row[0]), int(row[1])) for row in rows]
+
+        with open(self.path) as f:
+            data = json.load(f)
+        return [(to_seconds(p['Timestamp']), int(p['InService'])) for p in data]
+
+    def timeline(self, start, seconds, required):
+        return step_series(self.load(), start, seconds)
+
+
+class AutoScalingCapacity:
+    """
+    Polls describe_auto_scaling_groups every `interval` seconds during the test
+    and counts InService instances. `autoscaling` defaults to a boto3 client;
+    any object with that method can be passed when building the source in code.
+    """
+
+    kind = 'asg'
+
+    def __init__(self, asg_name, autoscaling=None, interval=15):
+        self.asg_name = asg_name
+        self.autoscaling = autoscaling
+        self.interval = interval
+        self.points = []
+
+    def sample(self, now):
+        if self.autoscaling is None:
+            import boto3
+            self.autoscaling = boto3.client('autoscaling')
+
+        response = self.autoscaling.describe_auto_scaling_groups(AutoScalingGroupNames=[self.asg_name])
+        groups = response['AutoScalingGroups']
+        if not groups:
+            return
+        in_service = sum(1 for i in groups[0]['Instances'] if i['LifecycleState'] == 'InService')
+        self.points.append((now, in_service))
+
+    def timeline(self, start, seconds, required):
+        return step_series(self.points, start, seconds)
+
+
+class SimulatedCapacity:
+    """
+    Local mock of a reactive scaler: every `evaluation_seconds` the desired
+    capacity is set to what the current users need, new instances come into
+    service `launch_seconds` later and scale-in is immediate. The predictor
+    plays no part, so this is only a reference baseline for the predictor's
+    scorecards to beat, never a measurement of the predictor itself.
+    """
+
+    kind = 'simulated'
+    interval = None
+
+    def __init__(self, min_instances=1, max_instances=10, evaluation_seconds=60, launch_seconds=420):
+        self.min_instances = min_instances
+        self.max_instances = max_instances
+        self.evaluation_seconds = evaluation_seconds
+        self.launch_seconds = launch_seconds
+
+    def sample(self, now):
+        pass
+
+    def _clamp(self, instances):
+        return min(max(instances, self.min_instances), self.max_instances)
+
+    def timeline(self, start, seconds, required):
+        if not seconds:
+            return []
+
+        # Start in the steady state for the first second's load
+        in_service = desired = self._clamp(required[0])
+        pending = []  # Seconds at which launched instances become InService
+        capacity = []
+
+        for second in range(seconds):
+            if second and second % self.evaluation_seconds == 0:
+                target = self._clamp(required[second])
+                if target > desired:
+                    pending.extend([second + self.launch_seconds] * (target - desired))
+                elif target < desired:
+                    # Cancel launches first, then terminate running instances
+                    excess = desired - target
+                    cancelled = min(excess, len(pending))
+                    del pending[len(pending) - cancelled:]
+                    in_service -= excess - cancelled
+                desired = target
+
+            ready = sum(1 for at in pending if at <= second)
+            if ready:
+                in_service += ready
+                pending = [at for at in pending if at > second]
+            capacity.append(in_service)
+
+        return capacity
+
+
+def capacity_source_from_env():
+    """
+    SCORECARD_CAPACITY selects the source: asg (default), file or simulated.
+    Returns None for asg without an ASG_NAME, which disables the scorecard.
+    """
+    kind = os.environ.get('SCORECARD_CAPACITY', 'asg')
+    if kind == 'asg':
+        if not os.environ.get('ASG_NAME'):
+            return None
+        return AutoScalingCapacity(
+            os.environ['ASG_NAME'],
+            interval=float(os.environ.get('SCORECARD_POLL_INTERVAL', 15))
+        )
+    if kind == 'file':
+        return RecordedCapacity(os.environ['SCORECARD_CAPACITY_FILE'])
+    if kind == 'simulated':
+        return SimulatedCapacity(
+            min_instances=int(os.environ.get('MIN_INSTANCES', 1)),
+            max_instances=int(os.environ.get('MAX_INSTANCES', 10)),
+            evaluation_seconds=int(os.environ.get('SIMULATED_EVALUATION_SECONDS', 60)),
+            launch_seconds=int(os.environ.get('SIMULATED_LAUNCH_SECONDS', 420))
+        )
+    raise ValueError(f"Unknown SCORECARD_CAPACITY '{kind}', expected asg, file or simulated")
+
+
+def latency_violations(snapshots, start, seconds, slo_ms, quantile, max_error_rate):
+    """
+    Per second, whether the histogram interval covering it broke the SLO:
+    the quantile over all endpoints above slo_ms, or errors above max_error_rate.
+    Seconds without a snapshot count as not violating.
+    """
+    violating = [False] * seconds
+    for snapshot in snapshots:
+        counts = {}
+        total = errors = 0
+        for name, endpoint in snapshot['endpoints'].items():
+            if name.startswith(EXCLUDED_ENDPOINT_PREFIXES):
+                continue
+            for index, count in zip(endpoint['index'], endpoint['counts']):
+                counts[index] = counts.get(index, 0) + count
+            total += endpoint['count']
+            errors += endpoint['errors']
+        if not total:
+            continue
+
+        index = sorted(counts)
+        merged = {'count': total, 'index': index, 'counts': [counts[i] for i in index]}
+        if latency_histograms.percentile(merged, quantile) <= slo_ms and errors / total <= max_error_rate:
+            continue
+
+        first = max(int(snapshot['start'] - start), 0)
+        last = min(int(math.ceil(snapshot['end'] - start)), seconds)
+        for second in range(first, last):
+            violating[second] = True
+    return violating
+
+
+def find_surges(users, fraction=0.5):
+    """
+    (start, end) second ranges where users are above base + fraction * (peak - base),
+    base and peak being the lowest and highest user counts of the test
+    """
+    if not users:
+        return []
+    base, peak = min(users), max(users)
+    if peak <= base:
+        return []
+
+    threshold = base + fraction * (peak - base)
+    surges = []
+    start = None
+    for second, count in enumerate(users):
+        if count > threshold and start is None:
+            start = second
+        elif count <= threshold and start is not None:
+            surges.append((start, second))
+            start = None
+    if start is not None:
+        surges.append((start, len(users)))
+    return surges
+
+
+def merge_gaps(failures, seconds):
+    """[start, end) second ranges covered by failed capacity polls, each (second, interval)"""
+    gaps = []
+    for second, interval in sorted(failures):
+        end = min(int(math.ceil(second + interval)), seconds)
+        second = int(second)
+        if gaps and second <= gaps[-1][1]:
+            gaps[-1][1] = max(gaps[-1][1], end)
+        elif second < end:
+            gaps.append([second, end])
+    return gaps
+
+
+def build_scorecard(start, users, capacity, snapshots, users_per_instance=25, min_instances=1,
+                    slo_ms=500, quantile=0.95, max_error_rate=0.01, surge_fraction=0.5,
+                    capacity_source=None, capacity_gaps=()):
+    """
+    Score each surge of a run
+
+    Each surge owns the seconds from its start to the next surge's start (or
+    the end of the test), so the scale-in after it is charged to it:
+    - time_to_capacity: seconds from the surge start until capacity first
+      covered the surge's peak requirement, None if it never did
+    - under_provisioned_seconds: seconds inside the surge with capacity below
+      what the users needed at that second
+    - slo_violating_seconds: seconds whose latency interval broke the SLO
+    - over_provisioned_instance_minutes: instances above the requirement, summed
+
+    capacity_gaps are [start, end) second ranges in which capacity could not
+    be sampled; the last good sample is carried through them, so the
+    seconds they cover (totals' capacity_gap_seconds) are less reliable.
+    """
+    seconds = min(len(users), len(capacity))
+    users, capacity = users[:seconds], capacity[:seconds]
+    required = [max(min_instances, math.ceil(u / users_per_instance)) for u in users]
+    violating = latency_violations(snapshots, start, seconds, slo_ms, quantile, max_error_rate)
+
+    def over_minutes(first, last):
+        return sum(max(capacity[t] - required[t], 0) for t in range(first, last)) / 60
+
+    surges = []
+    windows = find_surges(users, surge_fraction)
+    for i, (first, end) in enumerate(windows):
+        owned_end = windows[i + 1][0] if i + 1 < len(windows) else seconds
+        peak_required = max(required[first:end])
+        ready = next((t for t in range(first, owned_end) if capacity[t] >= peak_required), None)
+        surges.append({
+            'start': first,
+            'end': end,
+            'peak_users': max(users[first:end]),
+            'peak_required_instances': peak_required,
+            'time_to_capacity': ready - first if ready is not None else None,
+            'under_provisioned_seconds': sum(1 for t in range(first, end) if capacity[t] < required[t]),
+            'slo_violating_seconds': sum(violating[first:owned_end]),
+            'over_provisioned_instance_minutes': round(over_minutes(first, owned_end), 2)
+        })
+
+    times = [s['time_to_capacity'] for s in surges]
+    return {
+        'start': start,
+        'duration': seconds,
+        'config': {
+            'users_per_instance': users_per_instance,
+            'min_instances': min_instances,
+            'slo_ms': slo_ms,
+            'quantile': quantile,
+            'max_error_rate': max_error_rate,
+            'surge_fraction': surge_fraction,
+            'capacity_source': capacity_source
+        },
+        'surges': surges,
+        'totals': {
+            'surges': len(surges),
+            'max_time_to_capacity': None if None in times else max(times, default=0),
+            'under_provisioned_seconds': sum(1 for t in range(seconds) if capacity[t] < required[t]),
+            'slo_violating_seconds': sum(violating),
+            'over_provisioned_instance_minutes': round(over_minutes(0, seconds), 2),
+            'capacity_gap_seconds': sum(end - first for first, end in capacity_gaps)
+        },
+        'capacity_gaps': [list(gap) for gap in capacity_gaps],
+        'timeline': {'users': users, 'required': required, 'capacity': capacity}
+    }
+
+
+def format_scorecard(card):
+    lines = [
+        f"Scale-lag scorecard ({card['duration']}s, SLO p{card['config']['quantile'] * 100:g} "
+        f"<= {card['config']['slo_ms']:g} ms, {card['config']['users_per_instance']} users/instance)",
+        f"{'surge':<7}{'window s':>14}{'peak users':>12}{'instances':>11}{'to capacity s':>15}"
+        f"{'under s':>9}{'SLO viol s':>12}{'over inst-min':>15}"
+    ]
+    for i, s in enumerate(card['surges'], 1):
+        to_capacity = 'never' if s['time_to_capacity'] is None else s['time_to_capacity']
+        lines.append(
+            f"{i:<7}{str(s['start']) + '-' + str(s['end']):>14}{s['peak_users']:>12}{s['peak_required_instances']:>11}"
+            f"{to_capacity:>15}{s['under_provisioned_seconds']:>9}{s['slo_violating_seconds']:>12}"
+            f"{s['over_provisioned_instance_minutes']:>15.2f}"
+        )
+    totals = card['totals']
+    to_capacity = 'never' if totals['max_time_to_capacity'] is None else totals['max_time_to_capacity']
+    lines.append(
+        f"{'total':<7}{'':>14}{'':>12}{'':>11}{to_capacity:>15}{totals['under_provisioned_seconds']:>9}"
+        f"{totals['slo_violating_seconds']:>12}{totals['over_provisioned_instance_minutes']:>15.2f}"
+    )
+    if totals.get('capacity_gap_seconds'):
+        gaps = ', '.join(f"{first}-{end}" for first, end in card['capacity_gaps'])
+        lines.append(f"WARNING capacity could not be sampled for {totals['capacity_gap_seconds']}s ({gaps})")
+    return '\n'.join(lines)
+
+
+def compare(current, baseline, tolerance=0.1):
+    """Regressions of current's totals over baseline's, as readable messages"""
+    if current['config'].get('capacity_source') == 'simulated':
+        return ["capacity_source: the scorecard's capacity was simulated, so it says nothing about the predictor"]
+
+    regressions = []
+    for metric, slack in REGRESSION_METRICS.items():
+        now, before = current['totals'][metric], baseline['totals'][metric]
+        if now is None and before is None:
+            continue
+        if now is None:
+            regressions.append(f"{metric}: capacity never caught up (baseline {before})")
+            continue
+        if before is None:
+            continue
+        if now > before * (1 + tolerance) and now - before > slack:
+            regressions.append(f"{metric}: {now} vs baseline {before} (tolerance {tolerance:.0%})")
+    return regressions
+
+
+class ScaleScorecard:
+    """
+    Collects the user and capacity timelines while a test runs and writes the
+    scorecard when it stops. Runs on the master (or the local runner): the
+    master builds it on quitting, after the workers' last histograms merged.
+    """
+
+    def __init__(self, source, recorder, path='scale_scorecard.json', users_per_instance=25,
+                 min_instances=1, slo_ms=500, quantile=0.95, max_error_rate=0.01, surge_fraction=0.5):
+        self.source = source
+        self.recorder = recorder
+        self.path = path
+        self.options = {
+            'users_per_instance': users_per_instance,
+            'min_instances': min_instances,
+            'slo_ms': slo_ms,
+            'quantile': quantile,
+            'max_error_rate': max_error_rate,
+            'surge_fraction': surge_fraction
+        }
+
+        self.environment = None
+        self.started = None
+        self.users = []
+        self.sample_failures = []  # (second, interval) of failed capacity polls
+        self._greenlet = None
+
+    def install(self, environment):
+        """Attach to a Locust environment; call from an init event listener after the recorder's install"""
+        self.environment = environment
+        runner = environment.runner
+        if isinstance(runner, WorkerRunner):
+            return
+        if self.source is None:
+            print("No capacity source (set ASG_NAME or SCORECARD_CAPACITY) - scale-lag scorecard disabled")
+            return
+
+        environment.events.test_start.add_listener(self.start)
+        if isinstance(runner, MasterRunner):
+            environment.events.quitting.add_listener(self.finish)
+        else:
+            environment.events.test_stop.add_listener(self.finish)
+
+    def start(self, **kwargs):
+        if self._greenlet is None:
+            self.started = time.time()
+            self.users = []
+            self.sample_failures = []
+            self._greenlet = gevent.spawn(self._sample_loop)
+
+    def _sample_loop(self):
+        next_poll = self.started
+        while True:
+            now = time.time()
+            self.users.append(self.environment.runner.target_user_count or 0)
+            if self.source.interval and now >= next_poll:
+                # A throttled or failed poll must not stop the user timeline
+                try:
+                    self.source.sample(now)
+                except Exception as e:
+                    print(f"Could not sample capacity: {e}")
+                    self.sample_failures.append((now - self.started, self.source.interval))
+                next_poll = now + self.source.interval
+            gevent.sleep(1 - (time.time() - self.started) % 1)
+
+    def snapshots(self):
+        if not os.path.exists(self.recorder.path):
+            return []
+        # The histogram file is appended to across runs
+        return [
+            s for s in latency_histograms.read_histograms(self.recorder.path)
+            if s['end'] > self.started
+        ]
+
+    def build(self):
+        capacity = self.source.timeline(self.started, len(self.users), [
+            max(self.options['min_instances'], math.ceil(u / self.options['users_per_instance']))
+            for u in self.users
+        ])
+        return build_scorecard(
+            self.started, self.users, capacity, self.snapshots(),
+            capacity_source=self.source.kind,
+            capacity_gaps=merge_gaps(self.sample_failures, len(self.users)),
+            **self.options
+        )
+
+    def finish(self, **kwargs):
+        if self._greenlet is None:
+            return
+        self._greenlet.kill(block=False)
+        self._greenlet = None
+
+        card = self.build()
+        with open(self.path, 'w') as f:
+            json.dump(card, f)
+        print(format_scorecard(card))
+
+
+scorecard = ScaleScorecard(
+    capacity_source_from_env(),
+    latency_histograms.recorder,
+    path=os.environ.get('SCORECARD_FILE', 'scale_scorecard.json'),
+    users_per_instance=int(os.environ.get('USERS_PER_INSTANCE', 25)),
+    min_instances=int(os.environ.get('MIN_INSTANCES', 1)),
+    slo_ms=float(os.environ.get('SLO_LATENCY_MS', 500)),
+    quantile=float(os.environ.get('SLO_QUANTILE', 0.95)),
+    max_error_rate=float(os.environ.get('SLO_ERROR_RATE', 0.01)),
+    surge_fraction=float(os.environ.get('SURGE_FRACTION', 0.5))
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show a scale-lag scorecard or compare it against a baseline")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    show = commands.add_parser('show')
+    show.add_argument('scorecard')
+
+    check = commands.add_parser('compare', help="Exit with status 1 if the scorecard regressed")
+    check.add_argument('scorecard')
+    check.add_argument('baseline')
+    check.add_argument('--tolerance', type=float, default=0.1, help="Allowed relative increase per metric")
+    args = parser.parse_args()
+
+    with open(args.scorecard) as f:
+        card = json.load(f)
+    print(format_scorecard(card))
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(card, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
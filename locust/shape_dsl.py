@@ -0,0 +1,325 @@
+from datetime import datetime
+import csv
+import json
+import math
+import random
+
+
+def parse_duration(value):
+    """Seconds from a number or a string such as '90', '15m', '2h' or '1h30m'"""
+    if isinstance(value, (int, float)):
+        return int(value)
+
+    total = 0
+    number = ''
+    for char in str(value).strip():
+        if char.isdigit() or char == '.':
+            number += char
+        elif char in 'hms' and number:
+            total += float(number) * {'h': 3600, 'm': 60, 's': 1}[char]
+            number = ''
+        elif not char.isspace():
+            raise ValueError(f"Invalid duration: {value!r}")
+    if number:
+        total += float(number)
+    return int(total)
+
+
+class Shape:
+    """A user-count curve with one value per second"""
+
+    def render(self):
+        """Return a list of user counts (floats), one per second"""
+        raise NotImplementedError
+
+
+class Baseline(Shape):
+    def __init__(self, users, duration):
+        self.users = users
+        self.duration = parse_duration(duration)
+
+    def render(self):
+        return [float(self.users)] * self.duration
+
+
+class Ramp(Shape):
+    def __init__(self, start, end, duration):
+        self.start = start
+        self.end = end
+        self.duration = parse_duration(duration)
+
+    def render(self):
+        span = max(self.duration - 1, 1)
+        return [self.start + (self.end - self.start) * t / span for t in range(self.duration)]
+
+
+class Sine(Shape):
+    def __init__(self, min, max, period, duration, phase=0):
+        self.min = min
+        self.max = max
+        self.period = parse_duration(period)
+        self.duration = parse_duration(duration)
+        self.phase = parse_duration(phase)
+
+    def render(self):
+        middle = (self.max + self.min) / 2
+        amplitude = (self.max - self.min) / 2
+        return [
+            middle + amplitude * math.sin(2 * math.pi * (t + self.phase) / self.period)
+            for t in range(self.duration)
+        ]
+
+
+class Step(Shape):
+    def __init__(self, start, step, step_duration, steps):
+        self.start = start
+        self.step = step
+        self.step_duration = parse_duration(step_duration)
+        self.steps = steps
+
+    def render(self):
+        return [
+            float(self.start + self.step * (t // self.step_duration))
+            for t in range(self.step_duration * self.steps)
+        ]
+
+
+class Spike(Shape):
+    """`users` extra users from `at` for `duration` seconds, zero elsewhere; meant to be summed"""
+
+    def __init__(self, users, at, duration, rise=0, total=None):
+        self.users = users
+        self.at = parse_duration(at)
+        self.duration = parse_duration(duration)
+        self.rise = parse_duration(rise)
+        self.total = parse_duration(total) if total is not None else self.at + self.duration + self.rise
+
+    def render(self):
+        values = [0.0] * self.total
+        end = self.at + self.duration
+        for t in range(max(self.at - self.rise, 0), min(end + self.rise, self.total)):
+            if t < self.at:
+                values[t] = self.users * (t - self.at + self.rise) / self.rise
+            elif t < end:
+                values[t] = float(self.users)
+            else:
+                values[t] = self.users * (end + self.rise - t) / self.rise
+        return values
+
+
+class Noise(Shape):
+    """Gaussian jitter with the given stddev, reproducible through seed; meant to be summed"""
+
+    def __init__(self, stddev, duration, seed=None, smoothing=1):
+        self.stddev = stddev
+        self.duration = parse_duration(duration)
+        self.seed = seed
+        self.smoothing = max(int(smoothing), 1)
+
+    def render(self):
+        rng = random.Random(self.seed)
+        values = []
+        current = 0.0
+        for t in range(self.duration):
+            # Draw a new value every `smoothing` seconds and hold it in between
+            if t % self.smoothing == 0:
+                current = rng.gauss(0, self.stddev)
+            values.append(current)
+        return values
+
+
+class Trace(Shape):
+    """A recorded RequestCount series, see load_request_trace"""
+
+    def __init__(self, file, time_compression=60, peak_users=200, amplitude=1.0):
+        self.file = file
+        self.time_compression = time_compression
+        self.peak_users = peak_users
+        self.amplitude = amplitude
+
+    def render(self):
+        points = load_request_trace(self.file)
+        return trace_users(points, self.time_compression, self.peak_users * self.amplitude)
+
+
+class Sum(Shape):
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def render(self):
+        rendered = [part.render() for part in self.parts]
+        length = max(len(r) for r in rendered)
+        return [sum(r[t] for r in rendered if t < len(r)) for t in range(length)]
+
+
+class Max(Shape):
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def render(self):
+        rendered = [part.render() for part in self.parts]
+        length = max(len(r) for r in rendered)
+        return [max(r[t] if t < len(r) else 0.0 for r in rendered) for t in range(length)]
+
+
+class Sequence(Shape):
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def render(self):
+        values = []
+        for part in self.parts:
+            values.extend(part.render())
+        return values
+
+
+PRIMITIVES = {
+    'baseline': Baseline,
+    'ramp': Ramp,
+    'sine': Sine,
+    'step': Step,
+    'spike': Spike,
+    'noise': Noise,
+    'trace': Trace
+}
+
+COMBINATORS = {
+    'sum': Sum,
+    'max': Max,
+    'sequence': Sequence
+}
+
+
+def parse_shape(node):
+    """
+    Build a Shape from its dict form: a single key naming a primitive with its
+    parameters, or a combinator with a list of child nodes, e.g.
+
+        {"sum": [
+            {"sine": {"min": 20, "max": 150, "period": "15m", "duration": "2h"}},
+            {"spike": {"users": 250, "at": "40m", "duration": "3m", "rise": 30}},
+            {"noise": {"stddev": 5, "duration": "2h", "seed": 7, "smoothing": 10}}
+        ]}
+    """
+    if not isinstance(node, dict) or len(node) != 1:
+        raise ValueError(f"Shape node must have exactly one key, got {node!r}")
+
+    (kind, value), = node.items()
+    if kind in COMBINATORS:
+        return COMBINATORS[kind](*[parse_shape(child) for child in value])
+    if kind in PRIMITIVES:
+        return PRIMITIVES[kind](**value)
+    raise ValueError(f"Unknown shape '{kind}', expected one of {sorted(PRIMITIVES) + sorted(COMBINATORS)}")
+
+
+def schedule_from_users(users, min_users=0, min_spawn_rate=1):
+    """
+    Turn a per-second user curve into (user_count, spawn_rate) entries
+
+    spawn_rate is the change to the next second, so ramps follow the curve.
+    """
+    counts = [max(min_users, int(round(u))) for u in users]
+    last = len(counts) - 1
+    return [
+        (count, max(min_spawn_rate, abs(counts[min(i + 1, last)] - count)))
+        for i, count in enumerate(counts)
+    ]
+
+
+def compile_shape(shape, min_users=0, min_spawn_rate=1):
+    """Render a Shape (or its dict form) into a per-second schedule"""
+    if isinstance(shape, dict):
+        shape = parse_shape(shape)
+    return schedule_from_users(shape.render(), min_users=min_users, min_spawn_rate=min_spawn_rate)
+
+
+def load_shape_file(path):
+    """
+    Compile a JSON shape file: either a shape node, or an object with a
+    "shape" node plus optional "min_users" and "min_spawn_rate"
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    if 'shape' not in config:
+        config = {'shape': config}
+
+    return compile_shape(
+        config['shape'],
+        min_users=config.get('min_users', 0),
+        min_spawn_rate=config.get('min_spawn_rate', 1)
+    )
+
+
+def to_seconds(timestamp):
+    """Epoch seconds from epoch seconds (number or string) or an ISO 8601 timestamp"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    try:
+        return float(timestamp)
+    except ValueError:
+        return datetime.fromisoformat(str(timestamp).replace('Z', '+00:00')).timestamp()
+
+
+def load_request_trace(path):
+    """
+    Load a recorded RequestCount series as a list of (seconds, value) pairs
+
+    Accepts the JSON written from PredictiveScaler.collect_metrics (a dict with
+    a 'RequestCount' list, or the list of datapoints itself) or a CSV file with
+    timestamp,value rows. Timestamps are ISO 8601 strings or epoch seconds.
+    """
+    if path.endswith('.csv'):
+        with open(path, newline='') as f:
+            rows = [row for row in csv.reader(f) if row and not row[0].startswith('#')]
+        if rows and not rows[0][1].replace('.', '', 1).isdigit():
+            rows = rows[1:]  # Header
+        points = [(to_seconds(row[0]), float(row[1])) for row in rows]
+    else:
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data['RequestCount']
+        points = [(to_seconds(dp['Timestamp']), float(dp.get('Sum', dp.get('value', 0)))) for dp in data]
+
+    points.sort()
+    if not points:
+        raise ValueError(f"No datapoints in trace {path}")
+
+    start = points[0][0]
+    return [(t - start, v) for t, v in points]
+
+
+def trace_users(points, time_compression, peak_users):
+    """Linearly interpolate a trace at each compressed second, scaled so its peak is peak_users"""
+    peak = max(v for _, v in points) or 1
+    scale = peak_users / peak
+    duration = int(points[-1][0] / time_compression) + 1
+
+    users = []
+    segment = 0
+    for second in range(duration):
+        trace_time = second * time_compression
+        while segment < len(points) - 2 and points[segment + 1][0] <= trace_time:
+            segment += 1
+
+        (t0, v0), (t1, v1) = points[segment], points[min(segment + 1, len(points) - 1)]
+        progress = (trace_time - t0) / (t1 - t0) if t1 > t0 else 0
+        users.append((v0 + (v1 - v0) * min(max(progress, 0), 1)) * scale)
+
+    return users
+
+
+def build_trace_schedule(points, time_compression=60, peak_users=200, amplitude=1.0,
+                         min_users=1, min_spawn_rate=1):
+    """
+    Precompute one (user_count, spawn_rate) entry per second of compressed run time
+
+    The trace is linearly interpolated, normalized so its peak maps to
+    peak_users, then multiplied by amplitude.
+    """
+    return schedule_from_users(
+        trace_users(points, time_compression, peak_users * amplitude),
+        min_users=min_users,
+        min_spawn_rate=min_spawn_rate
+    )
@@ -1,5 +1,7 @@
 from locust import HttpUser, task, between, LoadTestShape
+from shape_dsl import load_request_trace, build_trace_schedule, load_shape_file
 import math
+import os
 
 class TrafficSurgeShape(LoadTestShape):
     """
@@ -131,3 +133,64 @@ class FlashSaleShape(LoadTestShape):
         else:
             # Normal baseline traffic
             return (self.baseline_users, 1)
+
+
+
+class ScheduledShape(LoadTestShape):
+    """
+    Base for shapes whose whole run is precomputed into one
+    (user_count, spawn_rate) entry per second, so tick() is a list lookup
+    """
+
+    abstract = True
+
+    def __init__(self):
+        super().__init__()
+        self.schedule = None
+
+    def build_schedule(self):
+        raise NotImplementedError
+
+    def tick(self):
+        # Built on first tick: Locust instantiates every shape in the file
+        if self.schedule is None:
+            self.schedule = self.build_schedule()
+
+        second = int(self.get_run_time())
+        if second >= len(self.schedule):
+            return None
+
+        return self.schedule[second]
+
+
+class TraceReplayShape(ScheduledShape):
+    """
+    Replays a recorded production RequestCount curve, e.g. last Black Friday
+
+    Configured through environment variables:
+    - TRACE_FILE: JSON or CSV trace (see load_request_trace)
+    - TRACE_COMPRESSION: trace seconds per second of test (default 60)
+    - TRACE_PEAK_USERS: users at the trace's peak (default 200)
+    - TRACE_AMPLITUDE: extra multiplier on top of that (default 1.0)
+
+    The schedule is computed once, so tick() is a single list lookup.
+    """
+
+    def build_schedule(self):
+        points = load_request_trace(os.environ['TRACE_FILE'])
+        return build_trace_schedule(
+            points,
+            time_compression=float(os.environ.get('TRACE_COMPRESSION', 60)),
+            peak_users=int(os.environ.get('TRACE_PEAK_USERS', 200)),
+            amplitude=float(os.environ.get('TRACE_AMPLITUDE', 1.0))
+        )
+
+
+class ComposedShape(ScheduledShape):
+    """
+    Runs a shape composed from shape_dsl primitives in the JSON file SHAPE_FILE,
+    e.g. shapes/flash_sale_on_daily_cycle.json
+    """
+
+    def build_schedule(self):
+        return load_shape_file(os.environ['SHAPE_FILE'])
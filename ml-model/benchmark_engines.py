@@ -0,0 +1,102 @@
+import argparse
+import json
+import multiprocessing
+import pickle
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from model_registry import current_rss_mb, peak_rss_mb, reset_peak_rss
+from predictive_scaler import PredictiveScaler, MODEL_ENGINES, get_engine, predict_with
+from synthetic_metrics import generate_metrics
+
+
+def benchmark_engine(name, train_features, train_targets, test_features, test_targets, predictions=200):
+    """Train one engine and measure its cost and accuracy"""
+    engine = get_engine(name)
+
+    # Without a resettable peak (off Linux) the growth is only seen once fit
+    # exceeds what the imports already used
+    reset_peak_rss()
+    rss_before = current_rss_mb() or peak_rss_mb()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    model, scaler = engine.fit(train_features, train_targets)
+    fit_seconds = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = peak_rss_mb()
+
+    artifact = pickle.dumps({'model': model, 'scaler': scaler, 'engine': name})
+    start = time.perf_counter()
+    pickle.loads(artifact)
+    load_seconds = time.perf_counter() - start
+
+    # The Lambda predicts a single feature row per invocation
+    latencies = []
+    for i in range(predictions):
+        row = test_features[i % len(test_features)].reshape(1, -1)
+        start = time.perf_counter()
+        predict_with(model, scaler, row)
+        latencies.append(time.perf_counter() - start)
+
+    errors = predict_with(model, scaler, test_features) - test_targets
+
+    return {
+        'engine': name,
+        'fit_seconds': fit_seconds,
+        'fit_peak_python_mb': peak_bytes / 1024 / 1024,
+        'peak_rss_mb': rss_after,
+        'fit_rss_growth_mb': max(rss_after - rss_before, 0.0) if rss_after is not None else None,
+        'artifact_kb': len(artifact) / 1024,
+        'load_seconds': load_seconds,
+        'predict_p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'predict_p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mae': float(np.mean(np.abs(errors)))
+    }
+
+
+def run_benchmark(days=7, engines=None, seed=42):
+    """Benchmark every engine on the same chronological train/test split"""
+    features, targets = PredictiveScaler.prepare_training_data(generate_metrics(days=days, seed=seed))
+    split = int(len(features) * 0.8)
+
+    # Each engine runs in a fresh process so peak RSS is not inherited from the previous one
+    results = []
+    for name in (engines or sorted(MODEL_ENGINES)):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results.append(pool.submit(
+                benchmark_engine, name, features[:split], targets[:split], features[split:], targets[split:]
+            ).result())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model engines on identical synthetic history")
+    parser.add_argument('--days', type=int, default=7, help="Days of 5 minute history to generate")
+    parser.add_argument('--engine', action='append', choices=sorted(MODEL_ENGINES), help="Engine to run (repeatable)")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(days=args.days, engines=args.engine)
+
+    # Memory columns are what fitting added: RSS over the process before the
+    # fit, and the Python heap peak (which misses native allocations)
+    print(f"{'engine':<24}{'fit s':>8}{'fit RSS MB':>11}{'heap MB':>9}{'size KB':>10}{'load s':>8}"
+          f"{'p50 ms':>8}{'p99 ms':>8}{'rmse':>7}{'mae':>7}")
+    for r in results:
+        growth = f"{r['fit_rss_growth_mb']:>11.1f}" if r['fit_rss_growth_mb'] is not None else f"{'-':>11}"
+        print(
+            f"{r['engine']:<24}{r['fit_seconds']:>8.3f}{growth}{r['fit_peak_python_mb']:>9.1f}{r['artifact_kb']:>10.1f}"
+            f"{r['load_seconds']:>8.3f}{r['predict_p50_ms']:>8.3f}{r['predict_p99_ms']:>8.3f}{r['rmse']:>7.3f}{r['mae']:>7.3f}"
+        )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
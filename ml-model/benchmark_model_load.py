@@ -0,0 +1,167 @@
+# Peak memory and time of loading a model artifact, per load path
+#
+# A random forest of the requested size is published to a file-backed local
+# registry, then every load path runs in a fresh process so RSS is measured
+# from the same starting point:
+#
+#     read      the old path, the whole S3 body read into bytes then unpickled
+#     stream    unpickled straight from the S3 body (MODEL_CACHE_DIR='')
+#     download  first load with the /tmp cache, streamed to disk then unpickled
+#     cache     later loads in a warm container, unpickled from the cached file
+#
+#     python benchmark_model_load.py --trees 300
+#     python benchmark_model_load.py --trees 300 --ceiling-mb 150 --max-overhead 0.1
+#
+# The exit status is 1 when a load path other than `read` has an overhead
+# (peak minus what the loaded model keeps) above --max-overhead times the
+# artifact size (0.25 by default), i.e. when the serialized copy was held
+# next to the model, or peaks more than --ceiling-mb above the RSS it
+# started from. test_model_load.py runs the same check.
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.ensemble import RandomForestRegressor
+from local_aws import LocalS3
+from model_registry import ModelRegistry, current_rss_mb, peak_rss_mb, reset_peak_rss
+from predictive_scaler import PredictiveScaler
+from synthetic_metrics import generate_metrics
+
+BUCKET = 'local-models'
+MODES = ['read', 'stream', 'download', 'cache']
+
+# Streaming holds one read buffer (model_registry.CHUNK_SIZE) on top of the
+# model, a fraction of any artifact worth streaming; `read` holds all of it
+MAX_OVERHEAD = 0.25
+
+
+def publish_model(directory, days=30, trees=100, max_depth=None, seed=42):
+    """Train a forest on synthetic history and publish it to a registry under directory, returns its version"""
+    features, targets = PredictiveScaler.prepare_training_data(generate_metrics(days=days, seed=seed))
+    model = RandomForestRegressor(n_estimators=trees, max_depth=max_depth, random_state=seed, n_jobs=-1)
+    model.fit(features, targets)
+
+    model_bytes = pickle.dumps({
+        'model': model,
+        'scaler': None,
+        'engine': 'random_forest',
+        'forecast_margin': 1.0
+    })
+    registry = ModelRegistry(LocalS3(os.path.join(directory, 's3')), BUCKET)
+    return registry.publish(model_bytes, metadata={'engine': 'random_forest', 'trees': trees})
+
+
+def measure_load(directory, version, mode):
+    """Load `version` once the `mode` way, in the calling process"""
+    cache_dir = os.path.join(directory, 'model-cache') if mode in ('download', 'cache') else None
+    registry = ModelRegistry(LocalS3(os.path.join(directory, 's3')), BUCKET, cache_dir=cache_dir)
+
+    if mode == 'cache':
+        registry.fetch(version)  # Cached by an earlier invocation
+
+    if mode == 'read':
+        reset_peak_rss()
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        response = registry.s3.get_object(Bucket=BUCKET, Key=registry.artifact_key(version))
+        model_data = pickle.loads(response['Body'].read())
+        seconds = time.perf_counter() - started
+        peak = peak_rss_mb()
+    else:
+        model_data = registry.load(version)
+        rss_before = registry.last_load['rss_before_mb']
+        seconds = registry.last_load['seconds']
+        peak = registry.last_load['peak_rss_mb']
+
+    retained = current_rss_mb()
+    del model_data
+    return {
+        'mode': mode,
+        'seconds': seconds,
+        'peak_mb': peak - rss_before,
+        'retained_mb': retained - rss_before
+    }
+
+
+def run_benchmark(days=30, trees=100, max_depth=None, modes=None):
+    with tempfile.TemporaryDirectory(prefix='model-load-') as directory:
+        version = publish_model(directory, days=days, trees=trees, max_depth=max_depth)
+        artifact_mb = os.path.getsize(
+            os.path.join(directory, 's3', BUCKET, *ModelRegistry(None, BUCKET).artifact_key(version).split('/'))
+        ) / 1024 / 1024
+
+        results = []
+        for mode in (modes or MODES):
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                results.append(pool.submit(measure_load, directory, version, mode).result())
+
+    return {
+        'meta': {'days': days, 'trees': trees, 'max_depth': max_depth, 'artifact_mb': artifact_mb},
+        'results': results
+    }
+
+
+def over_limits(report, ceiling_mb=None, max_overhead=MAX_OVERHEAD):
+    """Streaming and cached loads that went over the limits, as readable messages"""
+    failures = []
+    artifact_mb = report['meta']['artifact_mb']
+    for result in report['results']:
+        if result['mode'] == 'read':
+            continue
+        if ceiling_mb is not None and result['peak_mb'] > ceiling_mb:
+            failures.append(f"{result['mode']}: peak {result['peak_mb']:.1f} MB > ceiling {ceiling_mb:.1f} MB")
+        overhead = result['peak_mb'] - result['retained_mb']
+        if max_overhead is not None and overhead > max_overhead * artifact_mb:
+            failures.append(f"{result['mode']}: overhead {overhead:.1f} MB > "
+                            f"{max_overhead:.0%} of the {artifact_mb:.1f} MB artifact")
+    return failures
+
+
+def print_results(report):
+    meta = report['meta']
+    print(f"{meta['trees']} trees on {meta['days']} days, artifact {meta['artifact_mb']:.1f} MB")
+    print(f"{'mode':>10}{'seconds':>10}{'peak MB':>10}{'kept MB':>10}{'overhead MB':>12}")
+    for result in report['results']:
+        overhead = result['peak_mb'] - result['retained_mb']
+        print(f"{result['mode']:>10}{result['seconds']:>10.3f}{result['peak_mb']:>10.1f}"
+              f"{result['retained_mb']:>10.1f}{overhead:>12.1f}")
+
+
+def main():
+    if current_rss_mb() is None:
+        sys.exit("Needs /proc/self/status to measure RSS per load (Linux)")
+
+    parser = argparse.ArgumentParser(description="Measure peak RSS and time of each model load path")
+    parser.add_argument('--days', type=int, default=30, help="Synthetic history the forest is trained on")
+    parser.add_argument('--trees', type=int, default=100, help="Forest size, which sets the artifact size")
+    parser.add_argument('--max-depth', type=int, help="Tree depth limit (unlimited by default)")
+    parser.add_argument('--mode', action='append', choices=MODES, help="Load path to measure (repeatable, default all)")
+    parser.add_argument('--ceiling-mb', type=float, help="Fail when a streaming or cached load peaks above this")
+    parser.add_argument('--max-overhead', type=float, default=MAX_OVERHEAD,
+                        help="Fail when a streaming or cached load's overhead is above this fraction "
+                             f"of the artifact size (default {MAX_OVERHEAD})")
+    parser.add_argument('--json', help="Write the results to this file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.days, args.trees, args.max_depth, args.mode)
+    print_results(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failures = over_limits(report, args.ceiling_mb, args.max_overhead)
+    for message in failures:
+        print(f"OVER LIMIT {message}")
+    if failures:
+        sys.exit(1)
+    print("Every streaming and cached load stayed within its limits")
+
+
+if __name__ == "__main__":
+    main()
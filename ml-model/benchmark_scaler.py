@@ -0,0 +1,248 @@
+# Timing, memory and artifact size of the scaler's hot paths as history grows
+#
+# Every history length runs in a fresh process against local_harness, so no
+# AWS account is needed, and the peak RSS high-water mark is reset before each
+# stage, so a stage is not charged for the ones before it:
+#
+#     python benchmark_scaler.py --save-baseline baseline.json
+#     python benchmark_scaler.py --baseline baseline.json --tolerance 0.25
+#
+# With --baseline the exit status is 1 when any stage regressed beyond the tolerance,
+# and 2 when the baseline was recorded with another engine, segmentation,
+# worker count, seed, Python, scikit-learn or CPU count, which is not compared.
+#
+# load_model_download is a load that downloads the artifact, as on a cold
+# container; load_model is the best of the repeats from the local cache.
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import sklearn
+from local_harness import LocalHarness
+from model_registry import current_rss_mb, peak_rss_mb, reset_peak_rss
+from predictive_scaler import PredictiveScaler, RandomForestEngine, SEGMENTATIONS
+
+DEFAULT_DAYS = [1, 7, 30, 90]
+STAGES = ['prepare_training_data', 'train_model', 'save_model', 'load_model_download', 'load_model', 'predict_capacity']
+
+# Baseline meta that must match for timings to be comparable; repeats only
+# changes how many runs the best is taken from
+COMPARABLE_META = {
+    'engine': None,
+    'segmentation': 'none',
+    'workers': 1,
+    'seed': None,
+    'python': None,
+    'sklearn': None,
+    'cpu_count': None
+}
+
+# Differences below these are noise on a shared machine, whatever the ratio
+MIN_SECONDS_DELTA = 0.005
+MIN_MB_DELTA = 5.0
+
+
+def measure(function, repeats):
+    """Best wall time of `repeats` calls, plus the Python heap and RSS peaks of the calls"""
+    reset_peak_rss()
+    rss_before = current_rss_mb()
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    function()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peak = peak_rss_mb()
+    return result, {
+        'seconds': best,
+        'peak_python_mb': peak_bytes / 1024 / 1024,
+        'peak_rss_mb': peak,
+        # What the stage added on top of the process, None where RSS cannot be reset
+        'rss_growth_mb': max(peak - rss_before, 0) if peak is not None and rss_before is not None else None
+    }
+
+
+def benchmark_history(days, engine=RandomForestEngine.name, repeats=3, seed=42, segmentation='none', workers=1):
+    """Run every stage on `days` of synthetic history, in the calling process"""
+    harness = LocalHarness()
+    harness.seed_history(days, seed=seed)
+
+    stages = {}
+    with harness.installed(), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        scaler = PredictiveScaler()
+        scaler.segmentation = segmentation
+        scaler.training_workers = workers
+        metrics = scaler.collect_metrics(hours_back=days * 24)
+
+        (features, targets), stages['prepare_training_data'] = measure(
+            lambda: PredictiveScaler.prepare_training_data(metrics, scaler.drift_actual, **scaler.realized_params()), repeats
+        )
+        # Includes the residual quantile and the upload, as a retrain in the Lambda does
+        _, stages['train_model'] = measure(lambda: scaler.train_model(features, targets, engine_name=engine), repeats)
+
+        def save_model():
+            # Identical bytes at the same simulated second are the same version,
+            # which publish() would not upload again
+            harness.clock.advance(1)
+            return scaler.save_model()
+
+        version, stages['save_model'] = measure(save_model, repeats)
+
+        artifact = harness.s3.head_object(Bucket=harness.bucket, Key=scaler.registry.artifact_key(version))
+
+        loader = PredictiveScaler()
+
+        def load_model_download():
+            cached = loader.registry.cache_path(version)
+            if os.path.exists(cached):
+                os.remove(cached)
+            return loader.load_model()
+
+        _, stages['load_model_download'] = measure(load_model_download, repeats)
+        _, stages['load_model'] = measure(loader.load_model, repeats)
+
+        # One invocation's worth: an hour of metrics, one feature row, one prediction
+        predictions = max(repeats, 20)
+        _, stages['predict_capacity'] = measure(loader.predict_capacity, predictions)
+
+    return {
+        'days': days,
+        'rows': int(len(features)),
+        'artifact_kb': artifact['ContentLength'] / 1024,
+        'stages': stages
+    }
+
+
+def run_benchmark(days_list=None, engine=RandomForestEngine.name, repeats=3, seed=42, segmentation='none', workers=1):
+    results = {}
+    for days in (days_list or DEFAULT_DAYS):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results[str(days)] = pool.submit(
+                benchmark_history, days, engine, repeats, seed, segmentation, workers
+            ).result()
+
+    return {
+        'meta': {
+            'engine': engine,
+            'segmentation': segmentation,
+            'workers': workers,
+            'repeats': repeats,
+            'seed': seed,
+            'python': platform.python_version(),
+            'sklearn': sklearn.__version__,
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+
+
+def meta_mismatches(current, baseline):
+    """Meta fields that differ between two reports, as readable messages"""
+    mismatches = []
+    for field, default in COMPARABLE_META.items():
+        now, before = current['meta'].get(field, default), baseline['meta'].get(field, default)
+        if now != before:
+            mismatches.append(f"{field}: {now} vs baseline {before}")
+    return mismatches
+
+
+def compare(current, baseline, tolerance=0.25):
+    """
+    Stages, memory and artifact sizes that grew beyond the tolerance, as readable messages
+
+    Raises ValueError when the baseline's meta does not match (see
+    meta_mismatches), since its numbers would not be comparable.
+    """
+    mismatches = meta_mismatches(current, baseline)
+    if mismatches:
+        raise ValueError(f"Baseline is not comparable: {'; '.join(mismatches)}")
+    regressions = []
+
+    def check(label, now, before, min_delta):
+        if now is None or before is None:
+            return
+        if now > before * (1 + tolerance) and now - before > min_delta:
+            regressions.append(f"{label}: {now:.4g} vs baseline {before:.4g} (+{(now / before - 1):.0%})")
+
+    for days, result in current['results'].items():
+        base = baseline['results'].get(days)
+        if base is None:
+            continue
+        check(f"{days}d artifact_kb", result['artifact_kb'], base['artifact_kb'], 1.0)
+        for stage in STAGES:
+            now, before = result['stages'][stage], base['stages'].get(stage)
+            if before is None:
+                continue
+            check(f"{days}d {stage} seconds", now['seconds'], before['seconds'], MIN_SECONDS_DELTA)
+            check(f"{days}d {stage} peak_python_mb", now['peak_python_mb'], before['peak_python_mb'], MIN_MB_DELTA)
+            check(f"{days}d {stage} peak_rss_mb", now['peak_rss_mb'], before['peak_rss_mb'], MIN_MB_DELTA)
+            check(f"{days}d {stage} rss_growth_mb", now.get('rss_growth_mb'), before.get('rss_growth_mb'), MIN_MB_DELTA)
+    return regressions
+
+
+def print_results(report):
+    meta = report['meta']
+    print(f"engine={meta['engine']} segmentation={meta.get('segmentation', 'none')} "
+          f"workers={meta.get('workers', 1)} repeats={meta['repeats']}")
+    print(f"{'days':>5}{'rows':>8}{'stage':>24}{'seconds':>10}{'heap MB':>10}{'RSS MB':>9}{'+RSS MB':>9}{'size KB':>10}")
+    for days, result in report['results'].items():
+        for stage in STAGES:
+            s = result['stages'][stage]
+            rss = f"{s['peak_rss_mb']:>9.1f}" if s['peak_rss_mb'] is not None else f"{'-':>9}"
+            growth = f"{s['rss_growth_mb']:>9.1f}" if s.get('rss_growth_mb') is not None else f"{'-':>9}"
+            size = f"{result['artifact_kb']:>10.1f}" if stage == 'save_model' else f"{'':>10}"
+            print(f"{days:>5}{result['rows']:>8}{stage:>24}{s['seconds']:>10.4f}{s['peak_python_mb']:>10.1f}{rss}{growth}{size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scaler's stages on growing synthetic histories")
+    parser.add_argument('--days', type=int, action='append', help=f"History length in days (repeatable, default {DEFAULT_DAYS})")
+    parser.add_argument('--engine', default=RandomForestEngine.name)
+    parser.add_argument('--segmentation', default='none', choices=SEGMENTATIONS, help="Train per-segment models")
+    parser.add_argument('--workers', type=int, default=1, help="Processes for per-segment training")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs per stage, the best one is reported")
+    parser.add_argument('--save-baseline', help="Write the results as a baseline JSON file")
+    parser.add_argument('--baseline', help="Compare against this baseline and fail on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative increase per metric")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        args.days, engine=args.engine, repeats=args.repeats,
+        segmentation=args.segmentation, workers=args.workers
+    )
+    print_results(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        try:
+            regressions = compare(report, baseline, args.tolerance)
+        except ValueError as e:
+            print(e)
+            sys.exit(2)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
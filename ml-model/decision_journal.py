@@ -0,0 +1,310 @@
+import argparse
+import io
+import os
+import time
+import numpy as np
+from datetime import datetime
+
+
+FEATURE_NAMES = ['request_count', 'response_time', 'cpu', 'hour', 'day_of_week']
+PHASES = ['capacity', 'predict', 'shadow', 'drift', 'scale', 'warm_pool', 'total']
+
+
+class LocalJournalSink:
+    """Writes journal segments to a local directory (useful for testing)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def write(self, key, body):
+        path = os.path.join(self.directory, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        return path
+
+    def list_keys(self, prefix='journal/'):
+        root = os.path.join(self.directory, prefix)
+        keys = []
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                keys.append(os.path.relpath(os.path.join(dirpath, filename), self.directory).replace(os.sep, '/'))
+        return sorted(keys)
+
+    def read(self, key):
+        with open(os.path.join(self.directory, key), 'rb') as f:
+            return f.read()
+
+    def delete(self, key):
+        os.remove(os.path.join(self.directory, key))
+
+
+class S3JournalSink:
+    """Writes journal segments to S3"""
+
+    def __init__(self, s3, bucket):
+        self.s3 = s3
+        self.bucket = bucket
+
+    def write(self, key, body):
+        self.s3.put_object(Bucket=self.bucket, Key=key, Body=body)
+        return f"s3://{self.bucket}/{key}"
+
+    def list_keys(self, prefix='journal/'):
+        keys = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        return sorted(keys)
+
+    def read(self, key):
+        return self.s3.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def delete(self, key):
+        self.s3.delete_object(Bucket=self.bucket, Key=key)
+
+
+class DecisionJournal:
+    """
+    Append-only journal with one record per scaling invocation
+
+    Records are buffered in memory and flushed as a columnar segment (one
+    compressed numpy array per column) once the batch is full or the oldest
+    buffered record is older than max_age seconds. The age is only checked on
+    append, and a buffer is lost without a trace when its container is
+    recycled, so up to batch_size - 1 records (or max_age seconds of them)
+    can go missing per container. In Lambda, where containers are recycled
+    without notice, journal_from_env therefore flushes every record unless
+    JOURNAL_BATCH_SIZE says otherwise, and compact_journal() later merges
+    each day's single-record segments into one.
+    """
+
+    def __init__(self, sink, batch_size=12, max_age=3600):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.buffer = []
+        self.buffer_started = None
+
+    def append(self, request_id, features=None, forecast=None, current_capacity=None,
+               new_capacity=None, action='none', warm_pool_size=None, timings=None, timestamp=None,
+               model_version=None, model_predict_ms=None, model_load=None, shadow=None, retrain=None,
+               features_period=None):
+        """
+        Buffer one decision record and flush if the batch is due
+
+        model_predict_ms is the live model's own prediction time, model_load
+        the registry's load telemetry when it was loaded; shadow holds
+        the forecasts of models scored without being acted on, as
+        {version: {'forecast', 'predict_ms'}}; retrain is the outcome of a
+        drift retrain ('trained', 'skipped' or 'error') when one was attempted;
+        features_period is the start (epoch seconds) of the period the
+        features' metrics describe
+        """
+        if not self.buffer:
+            self.buffer_started = time.time()
+        self.buffer.append({
+            'timestamp': timestamp if timestamp is not None else time.time(),
+            'request_id': request_id or '',
+            'features': features,
+            'features_period': features_period,
+            'forecast': forecast,
+            'current_capacity': current_capacity,
+            'new_capacity': new_capacity,
+            'action': action,
+            'warm_pool_size': warm_pool_size,
+            'timings': timings or {},
+            'model_version': model_version or '',
+            'model_predict_ms': model_predict_ms,
+            'model_load': model_load or {},
+            'shadow': shadow or {},
+            'retrain': retrain or ''
+        })
+
+        if self.should_flush():
+            return self.flush()
+        return None
+
+    def should_flush(self):
+        if not self.buffer:
+            return False
+        if len(self.buffer) >= self.batch_size:
+            return True
+        return time.time() - self.buffer_started >= self.max_age
+
+    def flush(self):
+        """Write buffered records as one columnar segment, returns its location"""
+        if not self.buffer:
+            return None
+
+        first = datetime.utcfromtimestamp(self.buffer[0]['timestamp'])
+        key = (
+            f"journal/dt={first.strftime('%Y-%m-%d')}/"
+            f"segment-{first.strftime('%H%M%S')}-{len(self.buffer)}-{self.buffer[0]['request_id'][:8] or 'local'}.npz"
+        )
+
+        location = self.sink.write(key, encode_segment(to_columns(self.buffer)))
+        print(f"Flushed {len(self.buffer)} journal records to {location}")
+        self.buffer = []
+        return location
+
+
+def _number(value):
+    return np.nan if value is None else float(value)
+
+
+def to_columns(records):
+    """Convert a list of journal records into a dict of column arrays"""
+    features = np.full((len(records), len(FEATURE_NAMES)), np.nan)
+    for i, record in enumerate(records):
+        if record['features'] is not None:
+            features[i] = np.asarray(record['features'], dtype=float).ravel()[:len(FEATURE_NAMES)]
+
+    columns = {
+        'timestamp': np.array([r['timestamp'] for r in records], dtype=float),
+        'request_id': np.array([r['request_id'] for r in records], dtype=str),
+        'features': features,
+        'forecast': np.array([_number(r['forecast']) for r in records]),
+        'current_capacity': np.array([_number(r['current_capacity']) for r in records]),
+        'new_capacity': np.array([_number(r['new_capacity']) for r in records]),
+        'action': np.array([r['action'] for r in records], dtype=str),
+        'warm_pool_size': np.array([_number(r.get('warm_pool_size')) for r in records])
+    }
+
+    for phase in PHASES:
+        columns[f'timing_{phase}_ms'] = np.array([_number(r['timings'].get(phase)) for r in records])
+
+    columns['model_version'] = np.array([r.get('model_version', '') for r in records], dtype=str)
+    columns['model_predict_ms'] = np.array([_number(r.get('model_predict_ms')) for r in records])
+    columns['model_load_ms'] = np.array([
+        _number(r.get('model_load', {}).get('seconds', np.nan)) * 1000 for r in records
+    ])
+    columns['model_load_peak_rss_mb'] = np.array([_number(r.get('model_load', {}).get('peak_rss_mb')) for r in records])
+    columns['model_load_source'] = np.array([r.get('model_load', {}).get('source', '') for r in records], dtype=str)
+    columns['retrain'] = np.array([r.get('retrain', '') for r in records], dtype=str)
+    columns['features_period'] = np.array([_number(r.get('features_period')) for r in records])
+
+    # One forecast and one timing column per shadow model version
+    versions = sorted({version for r in records for version in r.get('shadow', {})})
+    for version in versions:
+        scored = [r.get('shadow', {}).get(version, {}) for r in records]
+        columns[f'shadow_forecast__{version}'] = np.array([_number(s.get('forecast')) for s in scored])
+        columns[f'shadow_predict_ms__{version}'] = np.array([_number(s.get('predict_ms')) for s in scored])
+
+    return columns
+
+
+def encode_segment(columns):
+    """One compressed numpy array per column"""
+    out = io.BytesIO()
+    np.savez_compressed(out, **columns)
+    return out.getvalue()
+
+
+def _missing(column, rows):
+    """Filler for a column that a segment does not have"""
+    if column.dtype.kind == 'U':
+        return np.full((rows,) + column.shape[1:], '', dtype=column.dtype)
+    return np.full((rows,) + column.shape[1:], np.nan)
+
+
+def read_journal(sink, prefix='journal/'):
+    """Load every segment under prefix and concatenate them column by column"""
+    segments = []
+    for key in sink.list_keys(prefix):
+        if key.endswith('.npz'):
+            with np.load(io.BytesIO(sink.read(key))) as segment:
+                segments.append({name: segment[name] for name in segment.files})
+
+    if not segments:
+        return {}
+
+    # Segments differ in their shadow columns and older ones lack newer columns
+    names = list(dict.fromkeys(name for s in segments for name in s))
+    columns = {}
+    for name in names:
+        template = next(s[name] for s in segments if name in s)
+        columns[name] = np.concatenate([
+            s[name] if name in s else _missing(template, len(s['timestamp'])) for s in segments
+        ])
+    order = np.argsort(columns['timestamp'], kind='stable')
+
+    # An interrupted compaction leaves records in both the merged segment and
+    # the originals; keep one of each
+    _, first = np.unique(
+        np.char.add(columns['request_id'][order], columns['timestamp'][order].astype(str)), return_index=True
+    )
+    order = order[np.sort(first)]
+    return {name: values[order] for name, values in columns.items()}
+
+
+def compact_journal(sink, day, prefix='journal/'):
+    """
+    Merge every segment of one day (YYYY-MM-DD) into a single segment
+
+    The merged segment is written before the originals are deleted, and
+    read_journal drops the duplicates if that is interrupted. Returns the
+    number of segments merged, 0 when the day already was one segment.
+    """
+    day_prefix = f"{prefix}dt={day}/"
+    keys = [key for key in sink.list_keys(day_prefix) if key.endswith('.npz')]
+    if len(keys) < 2:
+        return 0
+
+    columns = read_journal(sink, prefix=day_prefix)
+    first = datetime.utcfromtimestamp(columns['timestamp'][0])
+    merged = f"{day_prefix}compacted-{first.strftime('%H%M%S')}-{len(columns['timestamp'])}.npz"
+    sink.write(merged, encode_segment(columns))
+    for key in keys:
+        if key != merged:
+            sink.delete(key)
+    return len(keys)
+
+
+def journal_days(sink, prefix='journal/'):
+    """Days (YYYY-MM-DD) that have journal segments, oldest first"""
+    return sorted({key[len(prefix):].split('/')[0][len('dt='):] for key in sink.list_keys(prefix) if key.endswith('.npz')})
+
+
+def journal_from_env(s3=None):
+    """
+    Build a journal from JOURNAL_DIR (local) or S3_BUCKET
+
+    One segment per record by default: one small PUT every 5 minutes, and
+    nothing to lose when the container goes away. Run
+    `python decision_journal.py compact` daily to merge each finished day
+    into one segment, so read_journal needs one GET per day, not per record.
+    """
+    batch_size = int(os.environ.get('JOURNAL_BATCH_SIZE', 1))
+    max_age = float(os.environ.get('JOURNAL_MAX_AGE', 900))
+
+    if os.environ.get('JOURNAL_DIR'):
+        sink = LocalJournalSink(os.environ['JOURNAL_DIR'])
+    else:
+        if s3 is None:
+            import boto3
+            s3 = boto3.client('s3')
+        sink = S3JournalSink(s3, os.environ['S3_BUCKET'])
+
+    return DecisionJournal(sink, batch_size=batch_size, max_age=max_age)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the decision journal")
+    commands = parser.add_subparsers(dest='command', required=True)
+    compact = commands.add_parser('compact', help="Merge each finished day's segments into one (run daily)")
+    compact.add_argument('--day', action='append', help="Day to compact, YYYY-MM-DD (repeatable, default every day before today)")
+    compact.add_argument('--prefix', default='journal/')
+    args = parser.parse_args()
+
+    # JOURNAL_DIR or S3_BUCKET, as in the Lambda
+    sink = journal_from_env().sink
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+    days = args.day or [day for day in journal_days(sink, args.prefix) if day < today]
+    for day in days:
+        merged = compact_journal(sink, day, args.prefix)
+        print(f"{day}: merged {merged} segments" if merged else f"{day}: nothing to merge")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import json
+import math
+import numpy as np
+from datetime import datetime, timezone
+
+
+PERIOD_SECONDS = 300  # Matches the 5 minute CloudWatch period used for training
+
+
+def period_start(timestamp):
+    """Return the epoch second at which the 5 minute period containing timestamp starts"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    epoch = int(timestamp.timestamp())
+    return epoch - epoch % PERIOD_SECONDS
+
+
+def _instances(value):
+    # Rounded first so 2.0000001 instances does not become 3
+    return max(math.ceil(round(value, 6)), 1)
+
+
+def capacity_from_requests(metrics, requests_per_instance, **_):
+    """Instances the served RequestCount needed at requests_per_instance per period"""
+    if not requests_per_instance:
+        raise ValueError("Realized capacity from requests needs REQUESTS_PER_INSTANCE")
+    return [
+        {'Timestamp': d['Timestamp'], 'Capacity': _instances(d.get('Sum', 0) / requests_per_instance)}
+        for d in metrics.get('RequestCount', [])
+    ]
+
+
+def capacity_from_cpu(metrics, target_cpu=70.0, **_):
+    """
+    Instances that would have held average CPU at target_cpu
+
+    CPU saturates at 100%, so under heavy under-provisioning this
+    underestimates the need, but still by far less than the desired capacity.
+    """
+    desired = {period_start(d['Timestamp']): d.get('Average', 0) for d in metrics.get('GroupDesiredCapacity', [])}
+    return [
+        {'Timestamp': d['Timestamp'], 'Capacity': _instances(desired[period] * d.get('Average', 0) / target_cpu)}
+        for d in metrics.get('CPUUtilization', [])
+        for period in [period_start(d['Timestamp'])]
+        if period in desired
+    ]
+
+
+def desired_capacity(metrics, **_):
+    """
+    GroupDesiredCapacity as is
+
+    The scaler sets it from the forecast itself, so the error mostly measures
+    how much consecutive forecasts differ; kept only for comparison.
+    """
+    return [
+        {'Timestamp': d['Timestamp'], 'Capacity': d.get('Average', 0)}
+        for d in metrics.get('GroupDesiredCapacity', [])
+    ]
+
+
+# How the capacity a period actually needed is derived from its metrics
+REALIZED_CAPACITY = {
+    'requests': capacity_from_requests,
+    'cpu': capacity_from_cpu,
+    'desired': desired_capacity
+}
+
+
+def realized_capacity(method, metrics, min_instances=None, max_instances=None, **params):
+    """
+    Datapoints of the capacity each period needed, as {'Timestamp', 'Capacity'}
+
+    Clamped to the group's bounds like the forecasts are: demand beyond
+    max_instances is no error the model could have avoided.
+    """
+    if method not in REALIZED_CAPACITY:
+        raise ValueError(f"Unknown realized capacity '{method}', expected one of {sorted(REALIZED_CAPACITY)}")
+    datapoints = REALIZED_CAPACITY[method](metrics, **params)
+    for datapoint in datapoints:
+        if min_instances is not None:
+            datapoint['Capacity'] = max(datapoint['Capacity'], min_instances)
+        if max_instances is not None:
+            datapoint['Capacity'] = min(datapoint['Capacity'], max_instances)
+    return datapoints
+
+
+def _epoch(timestamp):
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+class DriftTracker:
+    """
+    Rolling, fixed-memory tracker of forecast error
+
+    Each forecast is stored against the period it predicts. When the capacity
+    that period turned out to need arrives (see REALIZED_CAPACITY), the error is pushed
+    into a ring buffer of the last `window` errors. Running sums over the ring
+    buffer give the rolling MAE, RMSE and bias in O(1) per update.
+
+    Retrains are rate limited: none within `cooldown` seconds of the last
+    attempt, and none for a whole window after a retrain whose model did
+    no better than the MAE that triggered it, since another retrain on the
+    same history would not either.
+    """
+
+    def __init__(self, window=288, mae_threshold=1.0, min_samples=12, cooldown=7200):
+        self.window = window
+        self.mae_threshold = mae_threshold
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+
+        # Epoch seconds of the last retrain attempt, and of the last
+        # successful retrain with the MAE that triggered it
+        self.retrain_attempted = None
+        self.retrained = None
+        self.retrain_mae = None
+
+        self.errors = np.zeros(window)
+        self.position = 0
+        self.count = 0
+        self.error_sum = 0.0
+        self.abs_error_sum = 0.0
+        self.squared_error_sum = 0.0
+
+        # period start (epoch seconds) -> forecast, bounded to `window` entries
+        self.pending = {}
+
+    def record_forecast(self, timestamp, predicted_capacity):
+        """Remember a forecast for the period following timestamp"""
+        target_period = period_start(timestamp) + PERIOD_SECONDS
+        self.pending[target_period] = float(predicted_capacity)
+
+        # Forecasts that never receive an actual are dropped oldest first
+        while len(self.pending) > self.window:
+            del self.pending[min(self.pending)]
+
+    def record_actual(self, timestamp, actual_capacity):
+        """Match a realized value with its forecast, returns the error or None"""
+        forecast = self.pending.pop(period_start(timestamp), None)
+        if forecast is None:
+            return None
+
+        error = forecast - float(actual_capacity)
+        self._push(error)
+        return error
+
+    def record_actuals(self, datapoints, now=None, stat='Average'):
+        """Match a list of CloudWatch datapoints against pending forecasts"""
+        # The datapoint of a period that is still running is only a partial average
+        cutoff = period_start(now or datetime.utcnow())
+
+        matched = 0
+        for datapoint in datapoints:
+            if period_start(datapoint['Timestamp']) >= cutoff:
+                continue
+            if self.record_actual(datapoint['Timestamp'], datapoint.get(stat, 0)) is not None:
+                matched += 1
+        return matched
+
+    def _push(self, error):
+        evicted = self.errors[self.position]
+        if self.count >= self.window:
+            self.error_sum -= evicted
+            self.abs_error_sum -= abs(evicted)
+            self.squared_error_sum -= evicted * evicted
+
+        self.errors[self.position] = error
+        self.error_sum += error
+        self.abs_error_sum += abs(error)
+        self.squared_error_sum += error * error
+
+        self.position = (self.position + 1) % self.window
+        self.count += 1
+
+    @property
+    def samples(self):
+        return min(self.count, self.window)
+
+    def statistics(self):
+        """Rolling error statistics over the current window"""
+        samples = self.samples
+        if samples == 0:
+            return {'samples': 0, 'mae': None, 'rmse': None, 'bias': None}
+
+        return {
+            'samples': samples,
+            'mae': float(self.abs_error_sum / samples),
+            'rmse': float(np.sqrt(max(self.squared_error_sum, 0.0) / samples)),
+            'bias': float(self.error_sum / samples)
+        }
+
+    def should_retrain(self, now=None):
+        """True once enough errors are recorded and the rolling MAE exceeds the threshold, outside the cooldowns"""
+        if self.samples < self.min_samples:
+            return False
+        mae = self.abs_error_sum / self.samples
+        if mae <= self.mae_threshold:
+            return False
+
+        now = _epoch(now or datetime.utcnow())
+        if self.retrain_attempted is not None and now - self.retrain_attempted < self.cooldown:
+            return False
+        if (self.retrain_mae is not None and mae >= self.retrain_mae
+                and now - self.retrained < self.window * PERIOD_SECONDS):
+            return False
+        return True
+
+    def record_retrain(self, succeeded, now=None):
+        """Start the cooldown; after a successful retrain, forget the old model's errors"""
+        now = _epoch(now or datetime.utcnow())
+        self.retrain_attempted = now
+        if succeeded:
+            self.retrained = now
+            self.retrain_mae = self.statistics()['mae']
+            self.reset()
+
+    def reset(self):
+        """Forget recorded errors, e.g. after the model has been retrained (see record_retrain)"""
+        self.errors[:] = 0
+        self.position = 0
+        self.count = 0
+        self.error_sum = 0.0
+        self.abs_error_sum = 0.0
+        self.squared_error_sum = 0.0
+        self.pending = {}
+
+    def to_json(self):
+        """Serialize the tracker state"""
+        # Store the ring buffer oldest first so it can be replayed on load
+        if self.count >= self.window:
+            ordered = np.roll(self.errors, -self.position)
+        else:
+            ordered = self.errors[:self.count]
+
+        return json.dumps({
+            'window': self.window,
+            'errors': ordered.tolist(),
+            'pending': {str(k): v for k, v in self.pending.items()},
+            'retrain_attempted': self.retrain_attempted,
+            'retrained': self.retrained,
+            'retrain_mae': self.retrain_mae,
+            'updated': datetime.utcnow().isoformat()
+        })
+
+    @classmethod
+    def from_json(cls, payload, mae_threshold=1.0, min_samples=12, cooldown=7200):
+        """Restore a tracker from to_json output"""
+        state = json.loads(payload)
+        tracker = cls(window=state['window'], mae_threshold=mae_threshold, min_samples=min_samples, cooldown=cooldown)
+        for error in state['errors']:
+            tracker._push(error)
+        tracker.pending = {int(k): v for k, v in state['pending'].items()}
+        tracker.retrain_attempted = state.get('retrain_attempted')
+        tracker.retrained = state.get('retrained')
+        tracker.retrain_mae = state.get('retrain_mae')
+        return tracker
@@ -0,0 +1,23 @@
+import argparse
+import json
+from predictive_scaler import PredictiveScaler
+
+
+def export_trace(path, hours_back=24):
+    """Write the RequestCount history collect_metrics gathers, for TraceReplayShape"""
+    scaler = PredictiveScaler()
+    metrics = scaler.collect_metrics(hours_back=hours_back)
+
+    with open(path, 'w') as f:
+        json.dump({'RequestCount': metrics['RequestCount']}, f, default=str, indent=1)
+
+    print(f"Wrote {len(metrics['RequestCount'])} datapoints to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export recorded RequestCount history for trace replay")
+    parser.add_argument('path', help="Output JSON file")
+    parser.add_argument('--hours', type=int, default=24, help="Hours of history to export")
+    args = parser.parse_args()
+
+    export_trace(args.path, hours_back=args.hours)
@@ -0,0 +1,420 @@
+import bisect
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+
+class SimulatedClock:
+    """
+    Epoch-second clock that only moves when advance() is called
+
+    `datetime` is a datetime subclass whose now()/utcnow() read this clock,
+    so modules that did `from datetime import datetime` can be pointed at it.
+    """
+
+    def __init__(self, start=datetime(2026, 1, 1)):
+        if isinstance(start, datetime):
+            start = (start if start.tzinfo else start.replace(tzinfo=timezone.utc)).timestamp()
+        self.now = float(start)
+
+        clock = self
+
+        class SimulatedDatetime(datetime):
+            @classmethod
+            def utcnow(cls):
+                return datetime.fromtimestamp(clock.now, timezone.utc).replace(tzinfo=None)
+
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.fromtimestamp(clock.now, tz)
+
+        self.datetime = SimulatedDatetime
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+        return self.now
+
+
+class ClientError(Exception):
+    """Raised by the local stand-ins where boto3 would raise botocore's ClientError"""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code}: {message}")
+        self.response = {'Error': {'Code': code, 'Message': message}}
+
+
+class LocalAutoScaling:
+    """
+    In-memory stand-in for the parts of the Auto Scaling API the scaler uses
+
+    Instances launched from the warm pool become InService after
+    warm_start_seconds, cold launches after cold_start_seconds. Every launch is
+    appended to `activities` so tests can assert how a scale-up was served.
+    save() and load() keep the group in a JSON file between runs.
+    """
+
+    def __init__(self, asg_name, desired=1, min_size=1, max_size=10,
+                 cold_start_seconds=420, warm_start_seconds=30, clock=time.time):
+        self.asg_name = asg_name
+        self.desired = desired
+        self.min_size = min_size
+        self.max_size = max_size
+        self.cold_start_seconds = cold_start_seconds
+        self.warm_start_seconds = warm_start_seconds
+        self.clock = clock
+
+        self._next_id = 0
+        self.instances = [self._instance(0) for _ in range(desired)]
+        self.warm_pool = None
+        self.warm_instances = 0
+        self.activities = []
+
+    def save(self, path):
+        """Write the group's state as JSON, see load()"""
+        state = {
+            'asg_name': self.asg_name,
+            'desired': self.desired,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'cold_start_seconds': self.cold_start_seconds,
+            'warm_start_seconds': self.warm_start_seconds,
+            'next_id': self._next_id,
+            'instances': self.instances,
+            'warm_pool': self.warm_pool,
+            'warm_instances': self.warm_instances,
+            'activities': self.activities
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path, clock=time.time):
+        """Restore a group written by save()"""
+        with open(path) as f:
+            state = json.load(f)
+
+        group = cls(
+            state['asg_name'], desired=0, min_size=state['min_size'], max_size=state['max_size'],
+            cold_start_seconds=state['cold_start_seconds'], warm_start_seconds=state['warm_start_seconds'],
+            clock=clock
+        )
+        group.desired = state['desired']
+        group._next_id = state['next_id']
+        group.instances = state['instances']
+        group.warm_pool = state['warm_pool']
+        group.warm_instances = state['warm_instances']
+        group.activities = state['activities']
+        return group
+
+    def _instance(self, ready_at):
+        instance_id = f"i-local{self._next_id:08d}"
+        self._next_id += 1
+        return {'InstanceId': instance_id, 'ReadyAt': ready_at}
+
+    def _check_group(self, name):
+        if name != self.asg_name:
+            raise ClientError('ValidationError', f"AutoScalingGroup name not found - {name}")
+
+    def _fill_warm_pool(self):
+        if self.warm_pool is None:
+            self.warm_instances = 0
+            return
+        prepared = self.warm_pool['MaxGroupPreparedCapacity']
+        size = self.max_size - self.desired if prepared in (None, -1) else prepared - self.desired
+        self.warm_instances = max(self.warm_pool['MinSize'], size, 0)
+
+    def describe_auto_scaling_groups(self, AutoScalingGroupNames):
+        if self.asg_name not in AutoScalingGroupNames:
+            return {'AutoScalingGroups': []}
+
+        now = self.clock()
+        return {
+            'AutoScalingGroups': [{
+                'AutoScalingGroupName': self.asg_name,
+                'DesiredCapacity': self.desired,
+                'MinSize': self.min_size,
+                'MaxSize': self.max_size,
+                'Instances': [
+                    {
+                        'InstanceId': i['InstanceId'],
+                        'LifecycleState': 'InService' if i['ReadyAt'] <= now else 'Pending'
+                    }
+                    for i in self.instances
+                ]
+            }]
+        }
+
+    def set_desired_capacity(self, AutoScalingGroupName, DesiredCapacity, HonorCooldown=True):
+        self._check_group(AutoScalingGroupName)
+        if not self.min_size <= DesiredCapacity <= self.max_size:
+            raise ClientError('ValidationError', f"New SetDesiredCapacity value {DesiredCapacity} is outside the group bounds")
+
+        now = self.clock()
+        while len(self.instances) < DesiredCapacity:
+            from_warm_pool = self.warm_instances > 0
+            if from_warm_pool:
+                self.warm_instances -= 1
+            boot = self.warm_start_seconds if from_warm_pool else self.cold_start_seconds
+            self.instances.append(self._instance(now + boot))
+            self.activities.append({'Time': now, 'Source': 'warm_pool' if from_warm_pool else 'cold', 'BootSeconds': boot})
+
+        # Scale-in returns nothing to the pool here; it is refilled from the configuration below
+        del self.instances[DesiredCapacity:]
+        self.desired = DesiredCapacity
+        self._fill_warm_pool()
+        return {}
+
+    def put_warm_pool(self, AutoScalingGroupName, MaxGroupPreparedCapacity=None, MinSize=0, PoolState='Stopped'):
+        self._check_group(AutoScalingGroupName)
+        self.warm_pool = {
+            'MaxGroupPreparedCapacity': MaxGroupPreparedCapacity,
+            'MinSize': MinSize,
+            'PoolState': PoolState,
+            'Status': 'Active'
+        }
+        self._fill_warm_pool()
+        return {}
+
+    def describe_warm_pool(self, AutoScalingGroupName):
+        self._check_group(AutoScalingGroupName)
+        return {
+            'WarmPoolConfiguration': dict(self.warm_pool) if self.warm_pool else None,
+            'Instances': [
+                {'InstanceId': f"i-warm{i:08d}", 'LifecycleState': f"Warmed:{self.warm_pool['PoolState']}"}
+                for i in range(self.warm_instances)
+            ]
+        }
+
+    def delete_warm_pool(self, AutoScalingGroupName, ForceDelete=False):
+        self._check_group(AutoScalingGroupName)
+        self.warm_pool = None
+        self._fill_warm_pool()
+        return {}
+
+
+# GetMetricStatistics rejects queries that could return more datapoints
+MAX_DATAPOINTS = 1440
+
+# Namespaces of the metrics collect_metrics reads
+METRIC_NAMESPACES = {
+    'RequestCount': 'AWS/ApplicationELB',
+    'TargetResponseTime': 'AWS/ApplicationELB',
+    'CPUUtilization': 'AWS/EC2',
+    'GroupDesiredCapacity': 'AWS/AutoScaling'
+}
+
+
+def _epoch(timestamp):
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+class LocalCloudWatch:
+    """
+    In-memory stand-in for get_metric_statistics and put_metric_data
+
+    Samples are kept sorted per (namespace, metric) and aggregated into Period
+    buckets on read, like CloudWatch does, which also rejects a query spanning
+    more than MAX_DATAPOINTS periods. Dimensions are ignored: the harness
+    models a single group. Datapoint timestamps are timezone-aware
+    UTC datetimes, as boto3 returns them.
+    """
+
+    def __init__(self):
+        self.samples = {}
+
+    def put_metric_data(self, Namespace, MetricData):
+        for datum in MetricData:
+            series = self.samples.setdefault((Namespace, datum['MetricName']), [])
+            bisect.insort(series, (_epoch(datum['Timestamp']), float(datum['Value'])))
+        return {}
+
+    def load(self, metrics):
+        """Add a collect_metrics-shaped dict (e.g. from synthetic_metrics) as samples"""
+        for name, datapoints in metrics.items():
+            namespace = METRIC_NAMESPACES.get(name, 'Custom')
+            series = self.samples.setdefault((namespace, name), [])
+            for datapoint in datapoints:
+                value = next(datapoint[stat] for stat in ('Sum', 'Average', 'Maximum', 'Value') if stat in datapoint)
+                series.append((_epoch(datapoint['Timestamp']), float(value)))
+            series.sort()
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a JSON file in the collect_metrics shape, as written by save()"""
+        cloudwatch = cls()
+        with open(path) as f:
+            cloudwatch.load(json.load(f))
+        return cloudwatch
+
+    def save(self, path):
+        """Write every sample as a collect_metrics-shaped JSON file"""
+        metrics = {
+            name: [
+                {'Timestamp': datetime.fromtimestamp(t, timezone.utc).isoformat(), 'Value': v}
+                for t, v in sorted(series)
+            ]
+            for (namespace, name), series in self.samples.items()
+        }
+        with open(path, 'w') as f:
+            json.dump(metrics, f)
+
+    def get_metric_statistics(self, Namespace, MetricName, StartTime, EndTime, Period, Statistics, Dimensions=None, Unit=None):
+        start, end = _epoch(StartTime), _epoch(EndTime)
+        if (end - start) / Period > MAX_DATAPOINTS:
+            raise ClientError(
+                'InvalidParameterCombination',
+                f"You have requested up to {int((end - start) / Period)} datapoints, "
+                f"which exceeds the limit of {MAX_DATAPOINTS}"
+            )
+
+        # Series are kept sorted, so a query only touches the samples in range
+        series = self.samples.get((Namespace, MetricName), [])
+        first = bisect.bisect_left(series, (start,))
+        last = bisect.bisect_left(series, (end,))
+
+        buckets = {}
+        for t, value in series[first:last]:
+            buckets.setdefault(int(t - t % Period), []).append(value)
+
+        datapoints = []
+        for bucket, values in buckets.items():
+            aggregates = {
+                'Sum': sum(values),
+                'Average': sum(values) / len(values),
+                'Maximum': max(values),
+                'Minimum': min(values),
+                'SampleCount': float(len(values))
+            }
+            datapoint = {'Timestamp': datetime.fromtimestamp(bucket, timezone.utc), 'Unit': Unit or 'None'}
+            datapoint.update({stat: aggregates[stat] for stat in Statistics})
+            datapoints.append(datapoint)
+
+        # CloudWatch does not order datapoints
+        return {'Label': MetricName, 'Datapoints': datapoints}
+
+
+class LocalStreamingBody:
+    """The read()/iter_chunks() part of botocore's StreamingBody over a file object"""
+
+    def __init__(self, fileobj, content_length):
+        self._raw = fileobj
+        self.content_length = content_length
+
+    def read(self, amt=None):
+        return self._raw.read() if amt is None else self._raw.read(amt)
+
+    def readinto(self, buffer):
+        return self._raw.readinto(buffer)
+
+    def iter_chunks(self, chunk_size=1024 * 1024):
+        while True:
+            chunk = self._raw.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        self._raw.close()
+
+
+class _Paginator:
+    def __init__(self, method):
+        self.method = method
+
+    def paginate(self, **kwargs):
+        yield self.method(**kwargs)
+
+
+class LocalS3:
+    """
+    Stand-in for the S3 object calls the scaler and journal make
+
+    Objects live in memory, or as files under `directory/<bucket>/<key>` when
+    a directory is given so state survives between runs.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.objects = {}
+
+    def _path(self, bucket, key):
+        return os.path.join(self.directory, bucket, *key.split('/'))
+
+    def put_object(self, Bucket, Key, Body=b'', **kwargs):
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        elif not isinstance(Body, (bytes, bytearray)):
+            Body = Body.read()
+
+        if self.directory is None:
+            self.objects[(Bucket, Key)] = bytes(Body)
+        else:
+            path = self._path(Bucket, Key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so readers never see a partial object
+            with open(path + '.tmp', 'wb') as f:
+                f.write(Body)
+            os.replace(path + '.tmp', path)
+        return {}
+
+    def _open(self, bucket, key):
+        if self.directory is None:
+            if (bucket, key) not in self.objects:
+                raise ClientError('NoSuchKey', 'The specified key does not exist.')
+            data = self.objects[(bucket, key)]
+            return io.BytesIO(data), len(data)
+
+        path = self._path(bucket, key)
+        if not os.path.isfile(path):
+            raise ClientError('NoSuchKey', 'The specified key does not exist.')
+        return open(path, 'rb'), os.path.getsize(path)
+
+    def get_object(self, Bucket, Key, **kwargs):
+        fileobj, length = self._open(Bucket, Key)
+        return {'Body': LocalStreamingBody(fileobj, length), 'ContentLength': length}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        fileobj, length = self._open(Bucket, Key)
+        fileobj.close()
+        return {'ContentLength': length}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        if self.directory is None:
+            self.objects.pop((Bucket, Key), None)
+        elif os.path.isfile(self._path(Bucket, Key)):
+            os.remove(self._path(Bucket, Key))
+        return {}
+
+    def _keys(self, bucket):
+        if self.directory is None:
+            return [key for b, key in self.objects if b == bucket]
+
+        root = os.path.join(self.directory, bucket)
+        keys = []
+        for current, _, files in os.walk(root):
+            for name in files:
+                if not name.endswith('.tmp'):
+                    keys.append(os.path.relpath(os.path.join(current, name), root).replace(os.sep, '/'))
+        return keys
+
+    def list_objects_v2(self, Bucket, Prefix='', **kwargs):
+        keys = sorted(key for key in self._keys(Bucket) if key.startswith(Prefix))
+        return {
+            'KeyCount': len(keys),
+            'IsTruncated': False,
+            'Contents': [{'Key': key} for key in keys]
+        }
+
+    def get_paginator(self, operation):
+        return _Paginator(getattr(self, operation))
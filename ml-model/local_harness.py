@@ -0,0 +1,296 @@
+# Run the Lambda handlers and train_model.py end to end without AWS
+#
+# boto3.client is pointed at the local_aws stand-ins and the modules' clocks
+# at a SimulatedClock, so the handlers run unchanged, five simulated minutes
+# per invocation, as fast as the model allows and with deterministic results.
+#
+#     python local_harness.py --history-days 7 --periods 288
+#     python local_harness.py --train --periods 288 --profile
+#     python local_harness.py --handler lambda_function_simple --state-dir .local-aws
+import argparse
+import contextlib
+import cProfile
+import importlib
+import json
+import math
+import os
+import pstats
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+import numpy as np
+import decision_journal
+from local_aws import METRIC_NAMESPACES, SimulatedClock, LocalCloudWatch, LocalAutoScaling, LocalS3
+from synthetic_metrics import generate_metrics
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'lambda')
+PERIOD = 300
+
+# Modules whose `from datetime import datetime` is pointed at the simulated clock
+CLOCK_MODULES = [
+    'predictive_scaler',
+    'drift_tracker',
+    'decision_journal',
+    'model_registry',
+    'lambda_function',
+    'lambda_function_simple'
+]
+
+
+class LocalContext:
+    def __init__(self, aws_request_id):
+        self.aws_request_id = aws_request_id
+
+
+class LocalHarness:
+    """
+    Local CloudWatch, Auto Scaling group and S3 bucket on a simulated clock
+
+    With `directory` the model store is file-backed and save_state() /
+    load_state() keep the metrics, group and clock there, so a run can be
+    continued later. Without it everything lives in memory, apart from a
+    temporary model cache.
+    """
+
+    def __init__(self, start=datetime(2026, 1, 1), asg_name='local-asg', bucket='local-models',
+                 min_size=1, max_size=10, requests_per_instance=3000,
+                 cold_start_seconds=420, warm_start_seconds=30, directory=None):
+        self.clock = SimulatedClock(start)
+        self.asg_name = asg_name
+        self.bucket = bucket
+        self.requests_per_instance = requests_per_instance
+        self.directory = directory
+
+        self.cloudwatch = LocalCloudWatch()
+        self.autoscaling = LocalAutoScaling(
+            asg_name, desired=min_size, min_size=min_size, max_size=max_size,
+            cold_start_seconds=cold_start_seconds, warm_start_seconds=warm_start_seconds,
+            clock=self.clock.time
+        )
+        self.s3 = LocalS3(os.path.join(directory, 's3') if directory else None)
+
+        # The Lambda's /tmp model cache
+        if directory:
+            self.model_cache = os.path.join(directory, 'model-cache')
+        else:
+            self._model_cache = tempfile.TemporaryDirectory(prefix='local-model-cache-')
+            self.model_cache = self._model_cache.name
+
+        self.results = []
+
+    def _state_path(self, name):
+        return os.path.join(self.directory, name)
+
+    def load_state(self):
+        """Continue from the metrics, group and clock saved in `directory`, returns False if there are none"""
+        if not self.directory or not os.path.exists(self._state_path('clock.json')):
+            return False
+
+        with open(self._state_path('clock.json')) as f:
+            self.clock.now = json.load(f)['now']
+        self.cloudwatch = LocalCloudWatch.from_file(self._state_path('metrics.json'))
+        self.autoscaling = LocalAutoScaling.load(self._state_path('autoscaling.json'), clock=self.clock.time)
+        return True
+
+    def save_state(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.cloudwatch.save(self._state_path('metrics.json'))
+        self.autoscaling.save(self._state_path('autoscaling.json'))
+        with open(self._state_path('clock.json'), 'w') as f:
+            json.dump({'now': self.clock.now}, f)
+
+    def client(self, service_name, *args, **kwargs):
+        """Replacement for boto3.client"""
+        clients = {'cloudwatch': self.cloudwatch, 'autoscaling': self.autoscaling, 's3': self.s3}
+        if service_name not in clients:
+            raise ValueError(f"No local stand-in for '{service_name}', expected one of {sorted(clients)}")
+        return clients[service_name]
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Point boto3, the environment and the modules' clocks at this harness"""
+        if LAMBDA_DIR not in sys.path:
+            sys.path.append(LAMBDA_DIR)
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(mock.patch('boto3.client', self.client))
+            stack.enter_context(mock.patch.dict(os.environ, {
+                'ASG_NAME': self.asg_name,
+                'S3_BUCKET': self.bucket,
+                'MIN_INSTANCES': str(self.autoscaling.min_size),
+                'MAX_INSTANCES': str(self.autoscaling.max_size),
+                'REQUESTS_PER_INSTANCE': str(self.requests_per_instance),
+                'MODEL_CACHE_DIR': os.environ.get('MODEL_CACHE_DIR', self.model_cache)
+            }))
+
+            for name in CLOCK_MODULES:
+                module = importlib.import_module(name)
+                if isinstance(getattr(module, 'datetime', None), type):
+                    stack.enter_context(mock.patch.object(module, 'datetime', self.clock.datetime))
+
+            # The journal's batch age uses time.time()
+            stack.enter_context(mock.patch.object(decision_journal, 'time', self.clock))
+            yield self
+
+    def seed_history(self, days, seed=42):
+        """Load `days` of synthetic history ending at the current simulated time"""
+        self.cloudwatch.load(generate_metrics(
+            days=days,
+            seed=seed,
+            requests_per_instance=self.requests_per_instance,
+            end_time=self.clock.datetime.utcnow()
+        ))
+
+    def synthetic_demand(self, periods, seed=43):
+        """RequestCount per period for the next `periods` periods, with the same seasonality as the history"""
+        days = math.ceil(periods * PERIOD / 86400)
+        end_time = self.clock.datetime.utcnow() + timedelta(days=days)
+        requests = generate_metrics(days=days, seed=seed, end_time=end_time)['RequestCount']
+        return [datapoint['Sum'] for datapoint in requests[:periods]]
+
+    def in_service(self):
+        group = self.autoscaling.describe_auto_scaling_groups(AutoScalingGroupNames=[self.asg_name])
+        return sum(1 for i in group['AutoScalingGroups'][0]['Instances'] if i['LifecycleState'] == 'InService')
+
+    def record_period(self, requests):
+        """
+        Publish the metrics of the period that just ended, serving `requests`
+        with the instances that are InService now
+        """
+        in_service = max(self.in_service(), 1)
+        cpu = min(max(100 * requests / (in_service * self.requests_per_instance * 1.25), 1), 100)
+        response_time = 0.05 + 0.002 * max(cpu - 60, 0) ** 1.5 / 10
+        timestamp = self.clock.now - PERIOD
+
+        for name, value in (
+            ('RequestCount', requests),
+            ('TargetResponseTime', response_time),
+            ('CPUUtilization', cpu),
+            ('GroupDesiredCapacity', self.autoscaling.desired)
+        ):
+            self.cloudwatch.put_metric_data(
+                Namespace=METRIC_NAMESPACES[name],
+                MetricData=[{'MetricName': name, 'Timestamp': timestamp, 'Value': value}]
+            )
+        return in_service
+
+    def train(self):
+        """Run train_model.py's training against the local history"""
+        with self.installed():
+            import train_model
+            train_model.train_model_standalone()
+
+    def run(self, handler='lambda_function', periods=288, demand=None, verbose=False):
+        """
+        Invoke `handler` once per simulated period; returns one result per invocation
+
+        Before each invocation the clock moves on one period and that period's
+        demand is published with the capacity that was InService to serve it.
+        The handlers' own logging is discarded unless verbose.
+        """
+        demand = demand if demand is not None else self.synthetic_demand(periods)
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(self.installed())
+            if not verbose:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+
+            module = importlib.import_module(handler)
+            if hasattr(module, 'journal'):
+                module.journal = None  # Journal into this harness's bucket
+
+            for i, requests in enumerate(demand[:periods]):
+                self.clock.advance(PERIOD)
+                in_service = self.record_period(requests)
+
+                started = time.perf_counter()
+                response = module.lambda_handler({}, LocalContext(f"local-{i:06d}"))
+                elapsed = time.perf_counter() - started
+
+                body = json.loads(response['body'])
+                self.results.append({
+                    'timestamp': self.clock.now,
+                    'requests': requests,
+                    'needed': math.ceil(requests / self.requests_per_instance),
+                    'in_service': in_service,
+                    'desired': self.autoscaling.desired,
+                    'action': body.get('action'),
+                    'status': response['statusCode'],
+                    'handler_ms': elapsed * 1000
+                })
+
+            if getattr(module, 'journal', None) is not None:
+                module.journal.flush()
+
+        return self.results
+
+
+def summarize(results):
+    if not results:
+        return {'invocations': 0}
+    handler_ms = np.array([r['handler_ms'] for r in results])
+    actions = {}
+    for r in results:
+        actions[r['action']] = actions.get(r['action'], 0) + 1
+    return {
+        'invocations': len(results),
+        'actions': actions,
+        'errors': sum(1 for r in results if r['status'] != 200),
+        'under_provisioned_periods': sum(1 for r in results if r['in_service'] < r['needed']),
+        'instance_hours': sum(r['in_service'] for r in results) * PERIOD / 3600,
+        'mean_desired': float(np.mean([r['desired'] for r in results])),
+        'handler_p50_ms': float(np.percentile(handler_ms, 50)),
+        'handler_p99_ms': float(np.percentile(handler_ms, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the predictive scaler end to end against local AWS stand-ins")
+    parser.add_argument('--handler', default='lambda_function', choices=['lambda_function', 'lambda_function_simple'])
+    parser.add_argument('--periods', type=int, default=288, help="5 minute invocations to simulate")
+    parser.add_argument('--history-days', type=int, default=7, help="Synthetic history loaded before the run")
+    parser.add_argument('--train', action='store_true', help="Run train_model.py before the handler")
+    parser.add_argument('--state-dir', help="Keep metrics, group, clock and bucket in this directory")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--profile', nargs='?', const='-', help="cProfile the run; print the top functions or write stats to a file")
+    parser.add_argument('--json', help="Write per-invocation results to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show the handlers' logging")
+    args = parser.parse_args()
+
+    harness = LocalHarness(directory=args.state_dir)
+    if not harness.load_state():
+        harness.seed_history(args.history_days, seed=args.seed)
+
+    profiler = None
+    if args.profile:
+        with harness.installed():
+            importlib.import_module(args.handler)  # Keep imports out of the profile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    if args.train:
+        harness.train()
+    results = harness.run(
+        args.handler, args.periods, harness.synthetic_demand(args.periods, seed=args.seed + 1), verbose=args.verbose
+    )
+
+    if profiler:
+        profiler.disable()
+        if args.profile == '-':
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+        else:
+            profiler.dump_stats(args.profile)
+
+    if args.state_dir:
+        harness.save_state()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    print(json.dumps(summarize(results), indent=2))
+
+
+if __name__ == "__main__":
+    main()
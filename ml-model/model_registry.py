@@ -0,0 +1,416 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+import time
+import numpy as np
+from datetime import datetime, timezone
+from drift_tracker import PERIOD_SECONDS, period_start, realized_capacity
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REGISTRY_PREFIX = 'models/registry/'
+LEGACY_MODEL_KEY = 'models/predictive_scaling_model.pkl'
+POINTER_HISTORY = 20  # Versions kept in current.json for rollback
+CHUNK_SIZE = 1024 * 1024
+
+
+def _proc_status_mb(field):
+    """A VmRSS/VmHWM style field of /proc/self/status in MB, None off Linux"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_mb():
+    return _proc_status_mb('VmRSS')
+
+
+def reset_peak_rss():
+    """Restart the peak RSS high-water mark at the current RSS, returns False where that is not possible"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak RSS since the last reset_peak_rss(), or of the whole process where it cannot be reset"""
+    peak = _proc_status_mb('VmHWM')
+    if peak is not None or resource is None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+class _StreamReader(io.RawIOBase):
+    """Raw file interface over a StreamingBody, so it can be buffered and unpickled from"""
+
+    def __init__(self, body):
+        self.body = body
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.body.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def unpickle_stream(body):
+    """Unpickle an S3 body as it arrives, without reading it into one bytes object first"""
+    return pickle.load(io.BufferedReader(_StreamReader(body), CHUNK_SIZE))
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts in S3 with a "current" pointer
+
+    Each published artifact is written once to versions/<version>/model.pkl,
+    named by its creation time and content hash, with a metadata.json next to
+    it; neither is ever overwritten. current.json names the live version and
+    the ones before it. It is a single small object, so replacing it is
+    atomic for readers, and a rollback is one more pointer write.
+
+    With a cache_dir (/tmp in Lambda) artifacts are downloaded there once and
+    unpickled from the file by every later load in the container; the newest
+    cache_versions files are kept.
+    """
+
+    def __init__(self, s3, bucket, prefix=REGISTRY_PREFIX, cache_dir=None, cache_versions=3):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache_dir = cache_dir
+        self.cache_versions = cache_versions
+        self.last_load = None
+
+    def artifact_key(self, version):
+        return f"{self.prefix}versions/{version}/model.pkl"
+
+    def metadata_key(self, version):
+        return f"{self.prefix}versions/{version}/metadata.json"
+
+    @property
+    def pointer_key(self):
+        return f"{self.prefix}current.json"
+
+    def _exists(self, key):
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception:
+            return False
+
+    def _read_json(self, key):
+        return json.loads(self.s3.get_object(Bucket=self.bucket, Key=key)['Body'].read())
+
+    def _write_json(self, key, payload):
+        self.s3.put_object(Bucket=self.bucket, Key=key, Body=json.dumps(payload).encode('utf-8'))
+
+    def publish(self, model_bytes, metadata=None, created=None):
+        """Store a serialized model as a new immutable version, returns the version"""
+        digest = hashlib.sha256(model_bytes).hexdigest()
+        created = created or datetime.utcnow()
+        version = f"{created.strftime('%Y%m%dT%H%M%S')}-{digest[:10]}"
+
+        if not self._exists(self.metadata_key(version)):
+            self.s3.put_object(Bucket=self.bucket, Key=self.artifact_key(version), Body=model_bytes)
+            # Metadata goes last: a version without it is an interrupted publish
+            self._write_json(self.metadata_key(version), dict(
+                metadata or {},
+                version=version,
+                created=created.isoformat(),
+                sha256=digest,
+                artifact_bytes=len(model_bytes)
+            ))
+        return version
+
+    def metadata(self, version):
+        return self._read_json(self.metadata_key(version))
+
+    def list_versions(self):
+        """Every completely published version, oldest first"""
+        versions = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}versions/"):
+            for obj in page.get('Contents', []):
+                if obj['Key'].endswith('/metadata.json'):
+                    versions.append(obj['Key'].split('/')[-2])
+        return sorted(versions)
+
+    def current(self):
+        """The pointer ({'version', 'history', 'updated', 'reason'}), None before the first promotion"""
+        try:
+            return self._read_json(self.pointer_key)
+        except Exception:
+            return None
+
+    def current_version(self):
+        pointer = self.current()
+        return pointer['version'] if pointer else None
+
+    def promote(self, version, reason=''):
+        """Make version the live model"""
+        if not self._exists(self.metadata_key(version)):
+            raise ValueError(f"Unknown model version '{version}'")
+
+        pointer = self.current() or {'version': None, 'history': []}
+        history = pointer['history']
+        if pointer['version'] and pointer['version'] != version:
+            history = [pointer['version']] + history
+
+        self._write_json(self.pointer_key, {
+            'version': version,
+            'history': history[:POINTER_HISTORY],
+            'updated': datetime.utcnow().isoformat(),
+            'reason': reason
+        })
+        return version
+
+    def rollback(self):
+        """Point back at the version that was live before the current one, returns it"""
+        pointer = self.current()
+        if not pointer or not pointer['history']:
+            raise ValueError("No previous model version to roll back to")
+
+        previous = pointer['history'][0]
+        self._write_json(self.pointer_key, {
+            'version': previous,
+            'history': pointer['history'][1:],
+            'updated': datetime.utcnow().isoformat(),
+            'reason': f"rollback from {pointer['version']}"
+        })
+        return previous
+
+    def load(self, version):
+        """
+        The unpickled model dict of a version
+
+        The serialized artifact is never held in memory whole, so it does not
+        coexist with the model: it is unpickled from the cached file, or
+        straight from the S3 stream without a cache_dir. last_load records
+        where it came from, how long it took and the peak RSS while loading.
+        """
+        per_load = reset_peak_rss()
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+
+        if self.cache_dir:
+            source = 'cache' if os.path.exists(self.cache_path(version)) else 'download'
+            path = self.fetch(version)
+            with open(path, 'rb') as f:
+                model_data = pickle.load(f)
+            os.utime(path)  # Most recently used
+        else:
+            response = self.s3.get_object(Bucket=self.bucket, Key=self.artifact_key(version))
+            model_data = unpickle_stream(response['Body'])
+            source = 'stream'
+
+        self.last_load = {
+            'version': version,
+            'source': source,
+            'seconds': time.perf_counter() - started,
+            'rss_before_mb': rss_before,
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_scope': 'load' if per_load else 'process'
+        }
+        return model_data
+
+    def cache_path(self, version):
+        return os.path.join(self.cache_dir, f"{version}.pkl")
+
+    def fetch(self, version):
+        """
+        Path of the version's artifact in cache_dir, streamed there in chunks
+        and checked against the hash in the version name if it is not cached
+        """
+        path = self.cache_path(version)
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        response = self.s3.get_object(Bucket=self.bucket, Key=self.artifact_key(version))
+        digest = hashlib.sha256()
+        partial = f"{path}.{os.getpid()}.part"
+        try:
+            with open(partial, 'wb') as f:
+                for chunk in iter(lambda: response['Body'].read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+            if not digest.hexdigest().startswith(version.rsplit('-', 1)[-1]):
+                raise ValueError(f"Artifact of model version '{version}' does not match its hash")
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        self._prune_cache(keep=path)
+        return path
+
+    def _prune_cache(self, keep):
+        cached = sorted(
+            (os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.pkl')),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        for path in [p for p in cached if p != keep][max(self.cache_versions - 1, 0):]:
+            os.remove(path)
+
+    def resolve(self, names):
+        """
+        Turn version names into versions: 'latest' is the newest version that
+        is not live, 'previous' the one live before the current one
+        """
+        versions = []
+        current = None
+        for name in names:
+            if name in ('latest', 'previous'):
+                current = current or self.current() or {'version': None, 'history': []}
+                if name == 'latest':
+                    candidates = [v for v in self.list_versions() if v != current['version']]
+                    version = candidates[-1] if candidates else None
+                else:
+                    version = current['history'][0] if current['history'] else None
+            else:
+                version = name
+            if version and version not in versions:
+                versions.append(version)
+        return versions
+
+
+def journal_realized_capacity(columns, actual='requests', **params):
+    """
+    {period start: capacity the period needed} from the journaled features
+
+    The request count and CPU of each row are turned into capacity with
+    drift_tracker.realized_capacity, as the drift tracker and training do.
+    Rows from before features_period was journaled are taken to describe
+    the period before their invocation. When several rows describe the same
+    period, the latest one wins: an earlier one may have seen it partial.
+    """
+    periods = columns.get('features_period', np.full(len(columns['timestamp']), np.nan))
+    metrics = {'RequestCount': [], 'CPUUtilization': [], 'GroupDesiredCapacity': []}
+    for timestamp, period, features, desired in zip(
+            columns['timestamp'], periods, columns['features'], columns['current_capacity']):
+        if np.isnan(features[0]):
+            continue
+        if np.isnan(period):
+            period = period_start(datetime.fromtimestamp(timestamp, timezone.utc)) - PERIOD_SECONDS
+        when = datetime.fromtimestamp(period, timezone.utc)
+        metrics['RequestCount'].append({'Timestamp': when, 'Sum': float(features[0])})
+        metrics['CPUUtilization'].append({'Timestamp': when, 'Average': float(features[2])})
+        if not np.isnan(desired):
+            metrics['GroupDesiredCapacity'].append({'Timestamp': when, 'Average': float(desired)})
+    return {period_start(d['Timestamp']): d['Capacity'] for d in realized_capacity(actual, metrics, **params)}
+
+
+def shadow_report(columns, actual='requests', **params):
+    """
+    Live vs shadow forecast accuracy from journal columns (see decision_journal.read_journal)
+
+    Each forecast is scored against the capacity the period it forecast
+    turned out to need (journal_realized_capacity, with realized_capacity's
+    `actual` method and `params`), matched by period rather than by row, so
+    missed or failed invocations do not shift the pairing. `vs_live` (mean
+    absolute difference from the live forecast) shows how far a shadow model
+    would have moved the group.
+    """
+    if not columns or len(columns['timestamp']) < 2:
+        return {}
+
+    realized = journal_realized_capacity(columns, actual, **params)
+    targets = [
+        period_start(datetime.fromtimestamp(timestamp, timezone.utc)) + PERIOD_SECONDS
+        for timestamp in columns['timestamp']
+    ]
+    actual_capacity = np.array([realized.get(target, np.nan) for target in targets], dtype=float)
+    report = {}
+    candidates = [('live', 'forecast', 'model_predict_ms')] + [
+        (name[len('shadow_forecast__'):], name, 'shadow_predict_ms__' + name[len('shadow_forecast__'):])
+        for name in sorted(columns) if name.startswith('shadow_forecast__')
+    ]
+    for label, forecast_column, timing_column in candidates:
+        errors = columns[forecast_column] - actual_capacity
+        scored = ~np.isnan(errors)
+        if not scored.any():
+            continue
+        timings = columns.get(timing_column)
+        difference = np.abs(columns[forecast_column] - columns['forecast'])
+        report[label] = {
+            'scored': int(scored.sum()),
+            'mae': float(np.mean(np.abs(errors[scored]))),
+            'bias': float(np.mean(errors[scored])),
+            'vs_live': float(np.nanmean(difference)),
+            'predict_ms': float(np.nanmean(timings)) if timings is not None and not np.isnan(timings).all() else None
+        }
+    return report
+
+
+def main():
+    import boto3
+    from decision_journal import S3JournalSink, read_journal
+
+    parser = argparse.ArgumentParser(description="Inspect and move the live model version")
+    parser.add_argument('--bucket', default=os.environ.get('S3_BUCKET'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="Published versions and which one is live")
+    show = commands.add_parser('show', help="Metadata of a version")
+    show.add_argument('version')
+    promote = commands.add_parser('promote', help="Make a version live")
+    promote.add_argument('version')
+    promote.add_argument('--reason', default='manual')
+    commands.add_parser('rollback', help="Go back to the previously live version")
+    report = commands.add_parser('shadow-report', help="Live vs shadow forecast error from the decision journal")
+    report.add_argument('--prefix', default='journal/')
+    requests_per_instance = float(os.environ.get('REQUESTS_PER_INSTANCE', 0))
+    report.add_argument('--actual', default=os.environ.get('DRIFT_ACTUAL', 'requests' if requests_per_instance else 'cpu'),
+                        help="How realized capacity is derived, as for drift scoring")
+    report.add_argument('--requests-per-instance', type=float, default=requests_per_instance)
+    report.add_argument('--target-cpu', type=float, default=float(os.environ.get('DRIFT_TARGET_CPU', 70)))
+    report.add_argument('--min-instances', type=int, default=int(os.environ.get('MIN_INSTANCES', 1)))
+    report.add_argument('--max-instances', type=int, default=int(os.environ.get('MAX_INSTANCES', 10)))
+    args = parser.parse_args()
+
+    s3 = boto3.client('s3')
+    registry = ModelRegistry(s3, args.bucket)
+
+    if args.command == 'list':
+        current = registry.current_version()
+        for version in registry.list_versions():
+            metadata = registry.metadata(version)
+            marker = '*' if version == current else ' '
+            print(f"{marker} {version}  {metadata.get('engine', '?'):<24}{metadata['artifact_bytes'] / 1024:>10.1f} KB")
+    elif args.command == 'show':
+        print(json.dumps(registry.metadata(args.version), indent=2))
+    elif args.command == 'promote':
+        print(f"Live model is now {registry.promote(args.version, reason=args.reason)}")
+    elif args.command == 'rollback':
+        print(f"Rolled back to {registry.rollback()}")
+    elif args.command == 'shadow-report':
+        columns = read_journal(S3JournalSink(s3, args.bucket), prefix=args.prefix)
+        print(json.dumps(shadow_report(
+            columns, args.actual,
+            requests_per_instance=args.requests_per_instance,
+            target_cpu=args.target_cpu,
+            min_instances=args.min_instances,
+            max_instances=args.max_instances
+        ), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,294 @@
 import boto3
 import json
+import math
+import multiprocessing
 import pickle
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.linear_model import Ridge
 from sklearn.preprocessing import StandardScaler
 import os
+import time
+from drift_tracker import DriftTracker, PERIOD_SECONDS, period_start, realized_capacity
+from model_registry import ModelRegistry, LEGACY_MODEL_KEY, unpickle_stream
+
+METRIC_PERIOD = 300  # 5 minutes
+MAX_DATAPOINTS = 1440  # Per GetMetricStatistics call
+MARGIN_HOLDOUT = 0.2  # Most recent share of the history the forecast margin is measured on
+
+
+class ModelEngine:
+    """Base class for the regressors PredictiveScaler can train"""
+    
+    name = None
+    scale_features = False  # Only distance/coefficient based models need a StandardScaler
+    
+    def create(self):
+        raise NotImplementedError
+    
+    def create_compact(self):
+        """Smaller, single-threaded variant for per-segment models"""
+        return self.create()
+    
+    def fit(self, features, targets, compact=False):
+        """Fit a new model, returns (model, scaler) where scaler may be None"""
+        scaler = None
+        if self.scale_features:
+            scaler = StandardScaler()
+            features = scaler.fit_transform(features)
+        
+        model = self.create_compact() if compact else self.create()
+        model.fit(features, targets)
+        return model, scaler
+
+
+class RandomForestEngine(ModelEngine):
+    name = 'random_forest'
+    
+    def create(self):
+        # Out-of-bag predictions give the forecast margin unseen residuals
+        # without fitting a second forest
+        return RandomForestRegressor(
+            n_estimators=100,
+            max_depth=10,
+            oob_score=True,
+            random_state=42,
+            n_jobs=-1
+        )
+    
+    def create_compact(self):
+        # Each segment sees a fraction of the rows and trains in its own process
+        return RandomForestRegressor(
+            n_estimators=30,
+            max_depth=8,
+            min_samples_leaf=3,
+            random_state=42,
+            n_jobs=1
+        )
+
+
+class HistGradientBoostingEngine(ModelEngine):
+    name = 'hist_gradient_boosting'
+    
+    def create(self):
+        # Bins each feature into at most 255 buckets, so fitting is
+        # O(samples) per tree and the model holds a few small trees
+        return HistGradientBoostingRegressor(
+            max_iter=100,
+            max_depth=6,
+            learning_rate=0.1,
+            random_state=42
+        )
+    
+    def create_compact(self):
+        return HistGradientBoostingRegressor(
+            max_iter=50,
+            max_depth=4,
+            learning_rate=0.15,
+            random_state=42
+        )
+
+
+class RidgeEngine(ModelEngine):
+    name = 'ridge'
+    scale_features = True
+    
+    def create(self):
+        return Ridge(alpha=1.0)
+
+
+MODEL_ENGINES = {
+    engine.name: engine
+    for engine in (RandomForestEngine, HistGradientBoostingEngine, RidgeEngine)
+}
+
+
+def get_engine(name):
+    """Look up a model engine by name"""
+    if name not in MODEL_ENGINES:
+        raise ValueError(f"Unknown model engine '{name}', expected one of {sorted(MODEL_ENGINES)}")
+    return MODEL_ENGINES[name]()
+
+
+def predict_with(model, scaler, features):
+    """Run a fitted model on raw feature rows, applying its scaler if it has one"""
+    if scaler is not None:
+        features = scaler.transform(features)
+    return model.predict(features)
+
+
+HOURS_PER_WEEK = 168
+SEGMENTATIONS = ['none', 'weekpart', 'hour_block']
+
+
+def hour_of_week(features):
+    """Hour of the week (0 = Monday 00:00) of each feature row, from its hour and weekday columns"""
+    features = np.asarray(features)
+    hours = features[:, 4].astype(np.intp) * 24 + features[:, 3].astype(np.intp)
+    return np.clip(hours, 0, HOURS_PER_WEEK - 1)
+
+
+def segment_table(segmentation, segment_hours=6):
+    """Segment id of every hour of the week"""
+    hours = np.arange(HOURS_PER_WEEK)
+    if segmentation == 'weekpart':
+        return (hours >= 5 * 24).astype(np.intp)  # Saturday 00:00 onwards
+    if segmentation == 'hour_block':
+        return hours // segment_hours
+    raise ValueError(f"Unknown segmentation '{segmentation}', expected one of {SEGMENTATIONS[1:]}")
+
+
+class SegmentedModel:
+    """
+    One compact model per segment of the week behind a single predict()
+    
+    `lookup` maps each hour of the week straight to its model's slot, so
+    dispatching a row is one array index. Segments that had too little
+    history share the slot of a model trained on every row.
+    """
+    
+    def __init__(self, segmentation, lookup, models):
+        self.segmentation = segmentation
+        self.lookup = lookup
+        self.models = models  # (model, scaler) per slot
+    
+    def predict(self, features):
+        features = np.asarray(features)
+        slots = self.lookup[hour_of_week(features)]
+        
+        # The Lambda predicts one row per invocation
+        if len(features) == 1:
+            return predict_with(*self.models[slots[0]], features)
+        
+        predictions = np.empty(len(features))
+        for slot in np.unique(slots):
+            rows = slots == slot
+            predictions[rows] = predict_with(*self.models[slot], features[rows])
+        return predictions
+
+
+def _fit_segment(engine_name, features, targets):
+    return get_engine(engine_name).fit(features, targets, compact=True)
+
+
+def fit_segmented(engine_name, features, targets, segmentation='weekpart', segment_hours=6,
+                  workers=1, min_rows=20):
+    """
+    Train a compact model per segment, in `workers` processes when above 1
+    
+    Keep workers at 1 inside Lambda, which has no /dev/shm for a process pool.
+    """
+    table = segment_table(segmentation, segment_hours)
+    segments = table[hour_of_week(features)]
+    
+    trained = [int(s) for s in np.unique(segments) if np.count_nonzero(segments == s) >= min_rows]
+    jobs = list(trained)
+    if len(trained) < len(np.unique(table)):
+        jobs.append(None)  # Fallback for segments without enough rows
+    
+    rows = [slice(None) if segment is None else segments == segment for segment in jobs]
+    workers = min(workers, len(jobs), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            models = list(pool.map(
+                _fit_segment,
+                [engine_name] * len(jobs),
+                [features[r] for r in rows],
+                [targets[r] for r in rows]
+            ))
+    else:
+        models = [_fit_segment(engine_name, features[r], targets[r]) for r in rows]
+    
+    slots = {segment: slot for slot, segment in enumerate(jobs)}
+    lookup = np.array([slots.get(int(segment), slots.get(None)) for segment in table], dtype=np.intp)
+    return SegmentedModel(segmentation, lookup, models)
+
+
+# Shadow models by version, kept across warm invocations
+_shadow_models = {}
+
 
 class PredictiveScaler:
-    def __init__(self):
-        self.cloudwatch = boto3.client('cloudwatch')
-        self.autoscaling = boto3.client('autoscaling')
-        self.s3 = boto3.client('s3')
+    def __init__(self, cloudwatch=None, autoscaling=None, s3=None):
+        # Clients can be injected, e.g. local_aws stand-ins for offline tests
+        self.cloudwatch = cloudwatch or boto3.client('cloudwatch')
+        self.autoscaling = autoscaling or boto3.client('autoscaling')
+        self.s3 = s3 or boto3.client('s3')
         
         self.asg_name = os.environ['ASG_NAME']
         self.s3_bucket = os.environ['S3_BUCKET']
         self.min_instances = int(os.environ.get('MIN_INSTANCES', 1))
         self.max_instances = int(os.environ.get('MAX_INSTANCES', 10))
+        self.engine_name = os.environ.get('MODEL_ENGINE', RandomForestEngine.name)
+        
+        # Optional per-segment models (see fit_segmented); more workers only off Lambda
+        self.segmentation = os.environ.get('MODEL_SEGMENTATION', 'none')
+        self.segment_hours = int(os.environ.get('SEGMENT_HOURS', 6))
+        self.training_workers = int(os.environ.get('TRAINING_WORKERS', 1))
+        
+        # Warm pool of pre-initialized instances, sized from the forecast's upper range
+        self.warm_pool_enabled = os.environ.get('WARM_POOL_ENABLED', 'false').lower() == 'true'
+        self.instance_lead_time = int(os.environ.get('INSTANCE_LEAD_TIME', 420))  # cold boot + user_data.sh
+        self.warm_pool_min = int(os.environ.get('WARM_POOL_MIN', 0))
+        self.warm_pool_state = os.environ.get('WARM_POOL_STATE', 'Stopped')
+        self.forecast_quantile = float(os.environ.get('FORECAST_QUANTILE', 0.9))
+        
+        # Retrain once the rolling forecast MAE (in instances) exceeds this
+        self.drift_mae_threshold = float(os.environ.get('DRIFT_MAE_THRESHOLD', 1.0))
+        self.drift_window = int(os.environ.get('DRIFT_WINDOW', 288))  # 24 hours of 5 minute periods
+        self.drift_min_samples = int(os.environ.get('DRIFT_MIN_SAMPLES', 12))
+        self.drift_cooldown = int(os.environ.get('DRIFT_RETRAIN_COOLDOWN', 7200))
+        # Models are trained on, and forecasts scored against, the capacity
+        # demand needed rather than the desired capacity the scaler set: from
+        # RequestCount when the per-instance throughput (requests per 5
+        # minutes) is known, otherwise from CPU
+        self.requests_per_instance = float(os.environ.get('REQUESTS_PER_INSTANCE', 0))
+        self.target_cpu = float(os.environ.get('DRIFT_TARGET_CPU', 70))
+        self.drift_actual = os.environ.get('DRIFT_ACTUAL', 'requests' if self.requests_per_instance else 'cpu')
+        
+        # Model versions: new models go live unless promoted by hand, shadow
+        # models are scored next to the live one without acting on them.
+        # Drift does not retrain while promotion is by hand: the live model
+        # would not change, so the drift would persist and retrain every hour.
+        # Artifacts are cached on /tmp, which outlives the invocation; an
+        # empty MODEL_CACHE_DIR unpickles straight from S3 instead
+        self.registry = ModelRegistry(
+            self.s3, self.s3_bucket,
+            cache_dir=os.environ.get('MODEL_CACHE_DIR', '/tmp/model-cache') or None,
+            cache_versions=int(os.environ.get('MODEL_CACHE_VERSIONS', 3))
+        )
+        self.auto_promote = os.environ.get('MODEL_AUTO_PROMOTE', 'true').lower() == 'true'
+        self.shadow_models = [name.strip() for name in os.environ.get('SHADOW_MODELS', '').split(',') if name.strip()]
         
         self.model = None
         self.scaler = None
+        self.engine = None
+        self.forecast_margin = 1.0
+        self.model_version = None
+        self.last_load = None
+        self.last_metrics = None
+        self.last_features = None
+        self.last_features_period = None
+        self.last_forecast = None
+        self.last_predict_ms = None
         
     def collect_metrics(self, hours_back=24):
-        """Collect CloudWatch metrics for training/prediction"""
+        """
+        Collect CloudWatch metrics for training/prediction
+        
+        GetMetricStatistics returns at most 1440 datapoints per call, so longer
+        histories (7 days at 5 minutes is 2016) are requested in windows.
+        """
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(hours=hours_back)
+        windows = []
+        window_start = start_time
+        while window_start < end_time:
+            window_end = min(window_start + timedelta(seconds=METRIC_PERIOD * MAX_DATAPOINTS), end_time)
+            windows.append((window_start, window_end))
+            window_start = window_end
         
         metrics_to_collect = [
             {
@@ -52,22 +316,40 @@ class PredictiveScaler:
         all_metrics = {}
         
         for metric_info in metrics_to_collect:
-            response = self.cloudwatch.get_metric_statistics(
-                Namespace=metric_info['namespace'],
-                MetricName=metric_info['metric_name'],
-                StartTime=start_time,
-                EndTime=end_time,
-                Period=300,  # 5 minutes
-                Statistics=[metric_info['stat']]
-            )
+            datapoints = []
+            for window_start, window_end in windows:
+                response = self.cloudwatch.get_metric_statistics(
+                    Namespace=metric_info['namespace'],
+                    MetricName=metric_info['metric_name'],
+                    StartTime=window_start,
+                    EndTime=window_end,
+                    Period=METRIC_PERIOD,
+                    Statistics=[metric_info['stat']]
+                )
+                datapoints.extend(response['Datapoints'])
             
-            datapoints = sorted(response['Datapoints'], key=lambda x: x['Timestamp'])
+            datapoints = sorted(datapoints, key=lambda x: x['Timestamp'])
             all_metrics[metric_info['metric_name']] = datapoints
             
         return all_metrics
     
-    def prepare_training_data(self, metrics_data):
-        """Prepare data for ML model training"""
+    def realized_params(self):
+        """Parameters of realized_capacity for this group, shared by training and drift scoring"""
+        return {
+            'requests_per_instance': self.requests_per_instance,
+            'target_cpu': self.target_cpu,
+            'min_instances': self.min_instances,
+            'max_instances': self.max_instances
+        }
+    
+    @staticmethod
+    def prepare_training_data(metrics_data, actual='desired', **params):
+        """
+        Prepare data for ML model training
+        
+        The target of each row is the next period's capacity as derived by
+        realized_capacity(actual, ...) with `params`, see realized_params()
+        """
         # Extract features and target
         timestamps = []
         features = []
@@ -77,6 +359,10 @@ class PredictiveScaler:
         response_times = metrics_data.get('TargetResponseTime', [])
         cpu_utilizations = metrics_data.get('CPUUtilization', [])
         desired_capacities = metrics_data.get('GroupDesiredCapacity', [])
+        realized = {
+            period_start(d['Timestamp']): d['Capacity']
+            for d in realized_capacity(actual, metrics_data, **params)
+        }
         
         # Align all metrics by timestamp
         for i in range(len(request_counts)):
@@ -97,44 +383,84 @@ class PredictiveScaler:
                 
                 features.append(feature_vector)
                 
-                # Target: desired capacity for next period (5 min ahead)
-                if i + 1 < len(desired_capacities):
-                    targets.append(desired_capacities[i + 1].get('Average', 1))
-                else:
-                    targets.append(desired_capacities[i].get('Average', 1))
+                # Target: capacity needed the next period (5 min ahead)
+                period = period_start(timestamp)
+                targets.append(realized.get(period + PERIOD_SECONDS, realized.get(period, 1)))
         
         return np.array(features), np.array(targets)
     
-    def train_model(self, features, targets):
-        """Train the Random Forest model"""
+    def train_model(self, features, targets, engine_name=None):
+        """Train a model with the configured engine (MODEL_ENGINE, random_forest by default)"""
         if len(features) < 10:
             print("Not enough data to train model")
             return False
-            
-        # Normalize features
-        self.scaler = StandardScaler()
-        features_scaled = self.scaler.fit_transform(features)
         
-        # Train Random Forest
-        self.model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42,
-            n_jobs=-1
-        )
+        engine = get_engine(engine_name or self.engine_name)
+        
+        if self.segmentation == 'none':
+            print(f"Training {engine.name} model")
+        else:
+            print(f"Training {engine.name} models per {self.segmentation} segment with {self.training_workers} workers")
+        self.model, self.scaler = self._fit(engine, features, targets)
+        self.engine = engine.name
         
-        self.model.fit(features_scaled, targets)
+        # Upper range of the forecast: how far actual capacity tends to exceed
+        # it on rows the model did not learn from. In-sample residuals of the
+        # tree engines are close to zero and would size the warm pool from
+        # the point forecast alone.
+        residuals = targets - self.predict(features)
+        unseen, margin_source = self._out_of_sample_residuals(engine, features, targets)
+        self.forecast_margin = float(max(np.quantile(unseen, self.forecast_quantile), 0.0))
         
         # Save model to S3
-        self.save_model()
+        self.save_model(metadata={
+            'training_rows': int(len(features)),
+            'training_rmse': float(np.sqrt(np.mean(residuals ** 2))),
+            'margin_source': margin_source,
+            'out_of_sample_rmse': float(np.sqrt(np.mean(unseen ** 2)))
+        })
         
         return True
     
-    def save_model(self):
-        """Save model and scaler to S3"""
+    def _fit(self, engine, features, targets):
+        """Fit `engine` as configured (one model or one per segment), returns (model, scaler)"""
+        if self.segmentation == 'none':
+            return engine.fit(features, targets)
+        model = fit_segmented(
+            engine.name, features, targets,
+            segmentation=self.segmentation,
+            segment_hours=self.segment_hours,
+            workers=self.training_workers
+        )
+        return model, None
+    
+    def _out_of_sample_residuals(self, engine, features, targets):
+        """
+        Residuals of the fitted model on rows it did not see, and where they came from
+        
+        The forest's out-of-bag predictions when it has them, otherwise those
+        of a model fitted the same way on all but the most recent
+        MARGIN_HOLDOUT of the (chronological) history, on that most recent part.
+        """
+        oob = getattr(self.model, 'oob_prediction_', None)
+        if oob is not None:
+            scored = ~np.isnan(oob)
+            return targets[scored] - oob[scored], 'oob'
+        
+        split = int(len(features) * (1 - MARGIN_HOLDOUT))
+        model, scaler = self._fit(engine, features[:split], targets[:split])
+        return targets[split:] - predict_with(model, scaler, features[split:]), 'holdout'
+    
+    def save_model(self, metadata=None):
+        """
+        Publish model and scaler as a new version in the model registry
+        Returns the version, which is live unless MODEL_AUTO_PROMOTE is false
+        """
         model_data = {
             'model': self.model,
             'scaler': self.scaler,
+            'engine': self.engine,
+            'forecast_margin': self.forecast_margin,
             'timestamp': datetime.utcnow().isoformat()
         }
         
@@ -142,32 +468,56 @@ class PredictiveScaler:
         model_bytes = pickle.dumps(model_data)
         
         # Upload to S3
-        self.s3.put_object(
-            Bucket=self.s3_bucket,
-            Key='models/predictive_scaling_model.pkl',
-            Body=model_bytes
-        )
+        version = self.registry.publish(model_bytes, metadata=dict(
+            metadata or {},
+            engine=self.engine,
+            segmentation=self.model.segmentation if isinstance(self.model, SegmentedModel) else 'none',
+            forecast_margin=self.forecast_margin,
+            trained_at=model_data['timestamp']
+        ))
+        print(f"Model saved to S3 as version {version}")
         
-        print("Model saved to S3")
+        if self.auto_promote:
+            self.registry.promote(version, reason='trained')
+            self.model_version = version
+            print(f"Model version {version} is live")
+        
+        return version
     
-    def load_model(self):
-        """Load model from S3"""
+    def load_model(self, version=None):
+        """Load the live model version (or `version`) from S3"""
         try:
-            response = self.s3.get_object(
-                Bucket=self.s3_bucket,
-                Key='models/predictive_scaling_model.pkl'
-            )
+            version = version or self.registry.current_version()
+            if version:
+                model_data = self.registry.load(version)
+                self.last_load = self.registry.last_load
+            else:
+                # Bucket from before the registry
+                started = time.perf_counter()
+                response = self.s3.get_object(Bucket=self.s3_bucket, Key=LEGACY_MODEL_KEY)
+                model_data = unpickle_stream(response['Body'])
+                version = 'legacy'
+                self.last_load = {'version': version, 'source': 'stream', 'seconds': time.perf_counter() - started}
             
-            model_data = pickle.loads(response['Body'].read())
             self.model = model_data['model']
             self.scaler = model_data['scaler']
+            self.engine = model_data.get('engine', RandomForestEngine.name)
+            self.forecast_margin = model_data.get('forecast_margin', 1.0)
+            self.model_version = version
             
-            print("Model loaded from S3")
+            peak, before = self.last_load.get('peak_rss_mb'), self.last_load.get('rss_before_mb')
+            print(f"Model {version} loaded from {self.last_load['source']} in {self.last_load['seconds'] * 1000:.0f} ms"
+                  + (f", peak RSS {peak:.0f} MB" if peak is not None else "")
+                  + (f" (+{peak - before:.0f} MB)" if peak is not None and before is not None else ""))
             return True
         except Exception as e:
             print(f"Could not load model: {e}")
             return False
     
+    def predict(self, features):
+        """Raw model predictions for a 2D array of feature rows"""
+        return predict_with(self.model, self.scaler, features)
+    
     def predict_capacity(self):
         """Predict required capacity for next period"""
         # Load model if not already loaded
@@ -178,6 +528,7 @@ class PredictiveScaler:
         
         # Get current metrics
         current_metrics = self.collect_metrics(hours_back=1)
+        self.last_metrics = current_metrics
         
         # Get latest values
         latest_request_count = current_metrics['RequestCount'][-1].get('Sum', 0) if current_metrics['RequestCount'] else 0
@@ -194,12 +545,20 @@ class PredictiveScaler:
             now.hour,
             now.weekday()
         ]])
-        
-        # Scale features
-        feature_scaled = self.scaler.transform(feature_vector)
+        self.last_features = feature_vector[0]
+        # The period the request count describes, so journaled rows can be matched by period
+        self.last_features_period = (
+            period_start(current_metrics['RequestCount'][-1]['Timestamp']) if current_metrics['RequestCount'] else None
+        )
         
         # Predict
-        predicted_capacity = self.model.predict(feature_scaled)[0]
+        started = time.perf_counter()
+        predicted_capacity = self.predict(feature_vector)[0]
+        self.last_predict_ms = (time.perf_counter() - started) * 1000
+        self.last_forecast = {
+            'point': float(predicted_capacity),
+            'upper': float(predicted_capacity) + self.forecast_margin
+        }
         
         # Round and constrain
         predicted_capacity = int(round(predicted_capacity))
@@ -207,6 +566,99 @@ class PredictiveScaler:
         
         return predicted_capacity
     
+    def shadow_predict(self):
+        """
+        Score the SHADOW_MODELS versions on the feature row predict_capacity used
+        
+        Nothing is acted on: the forecasts, clamped like the live one, and the
+        time each model took are returned for the decision journal as
+        {version: {'forecast', 'predict_ms'}}. Versions are immutable, so each
+        is loaded once per container and dropped once it is no longer a shadow.
+        """
+        if not self.shadow_models or self.last_features is None:
+            return {}
+        
+        versions = self.registry.resolve(self.shadow_models)
+        for version in [v for v in _shadow_models if v not in versions]:
+            del _shadow_models[version]
+        
+        rows = np.atleast_2d(self.last_features)
+        results = {}
+        for version in versions:
+            if version == self.model_version:
+                continue
+            try:
+                if version not in _shadow_models:
+                    model_data = self.registry.load(version)
+                    _shadow_models[version] = (model_data['model'], model_data['scaler'])
+                model, scaler = _shadow_models[version]
+                
+                started = time.perf_counter()
+                forecast = predict_with(model, scaler, rows)[0]
+                predict_ms = (time.perf_counter() - started) * 1000
+            except Exception as e:
+                print(f"Could not score shadow model {version}: {e}")
+                continue
+            
+            results[version] = {
+                'forecast': max(self.min_instances, min(self.max_instances, int(round(forecast)))),
+                'predict_ms': predict_ms
+            }
+        return results
+    
+    def retrain(self, hours_back=168):
+        """Collect history, rebuild the training set and train a new model"""
+        metrics = self.collect_metrics(hours_back=hours_back)
+        features, targets = self.prepare_training_data(metrics, self.drift_actual, **self.realized_params())
+        return self.train_model(features, targets)
+    
+    def load_drift_tracker(self):
+        """Load the drift tracker state from S3, or start a new tracker"""
+        try:
+            response = self.s3.get_object(
+                Bucket=self.s3_bucket,
+                Key='models/drift_state.json'
+            )
+            return DriftTracker.from_json(
+                response['Body'].read(),
+                mae_threshold=self.drift_mae_threshold,
+                min_samples=self.drift_min_samples,
+                cooldown=self.drift_cooldown
+            )
+        except Exception as e:
+            print(f"Starting new drift tracker: {e}")
+            return DriftTracker(
+                window=self.drift_window,
+                mae_threshold=self.drift_mae_threshold,
+                min_samples=self.drift_min_samples,
+                cooldown=self.drift_cooldown
+            )
+    
+    def save_drift_tracker(self, tracker):
+        """Save the drift tracker state to S3"""
+        self.s3.put_object(
+            Bucket=self.s3_bucket,
+            Key='models/drift_state.json',
+            Body=tracker.to_json().encode('utf-8')
+        )
+    
+    def track_prediction(self, predicted_capacity):
+        """
+        Score earlier forecasts against realized capacity and record the new one
+        Returns the updated tracker
+        """
+        tracker = self.load_drift_tracker()
+        now = datetime.utcnow()
+        
+        if self.last_metrics:
+            actuals = realized_capacity(self.drift_actual, self.last_metrics, **self.realized_params())
+            matched = tracker.record_actuals(actuals, now=now, stat='Capacity')
+            print(f"Matched {matched} forecasts with realized capacity ({self.drift_actual})")
+        
+        tracker.record_forecast(now, predicted_capacity)
+        self.save_drift_tracker(tracker)
+        return tracker
+    
     def scale_autoscaling_group(self, desired_capacity):
         """Scale the Auto Scaling Group"""
         try:
@@ -222,6 +674,55 @@ class PredictiveScaler:
             print(f"Error scaling Auto Scaling Group: {e}")
             return False
     
+    def warm_pool_size(self, desired_capacity):
+        """
+        Number of warmed instances to keep for the forecast's upper range
+        
+        The spread between the point forecast and its upper range is widened
+        by sqrt(periods) to cover every 5 minute period a cold boot would take.
+        """
+        if self.last_forecast is None:
+            return self.warm_pool_min
+        
+        periods = max(1, math.ceil(self.instance_lead_time / 300))
+        spread = self.last_forecast['upper'] - self.last_forecast['point']
+        peak = self.last_forecast['point'] + spread * math.sqrt(periods)
+        
+        size = math.ceil(peak) - desired_capacity
+        return max(self.warm_pool_min, min(size, self.max_instances - desired_capacity))
+    
+    def update_warm_pool(self, desired_capacity):
+        """Resize the ASG warm pool for the new desired capacity, returns the pool size"""
+        if not self.warm_pool_enabled:
+            return None
+        
+        size = max(self.warm_pool_size(desired_capacity), 0)
+        min_size = size
+        max_prepared = desired_capacity + size
+        
+        try:
+            response = self.autoscaling.describe_warm_pool(AutoScalingGroupName=self.asg_name)
+            config = response.get('WarmPoolConfiguration') or {}
+            
+            if (config.get('MinSize') == min_size
+                    and config.get('MaxGroupPreparedCapacity') == max_prepared
+                    and config.get('PoolState') == self.warm_pool_state):
+                print(f"Warm pool already at {size} instances")
+                return size
+            
+            self.autoscaling.put_warm_pool(
+                AutoScalingGroupName=self.asg_name,
+                MaxGroupPreparedCapacity=max_prepared,
+                MinSize=min_size,
+                PoolState=self.warm_pool_state
+            )
+            
+            print(f"Warm pool sized to {size} instances ({self.warm_pool_state})")
+            return size
+        except Exception as e:
+            print(f"Error updating warm pool: {e}")
+            return None
+    
     def get_current_capacity(self):
         """Get current ASG capacity"""
         try:
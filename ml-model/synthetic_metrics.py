@@ -0,0 +1,37 @@
+import numpy as np
+from datetime import datetime, timedelta
+
+
+def generate_metrics(days=7, period=300, seed=42, requests_per_instance=3000, end_time=None):
+    """
+    Generate CloudWatch-shaped metric history with daily and weekly seasonality
+
+    Returns the same structure as PredictiveScaler.collect_metrics: a dict of
+    metric name -> list of datapoints sorted by Timestamp.
+    """
+    rng = np.random.default_rng(seed)
+    points = int(days * 86400 / period)
+    end_time = end_time or datetime(2026, 1, 1)
+    start_time = end_time - timedelta(seconds=points * period)
+
+    timestamps = [start_time + timedelta(seconds=i * period) for i in range(points)]
+    hours = np.array([(t.hour + t.minute / 60) for t in timestamps])
+    weekdays = np.array([t.weekday() for t in timestamps])
+
+    daily = 0.6 + 0.4 * np.sin((hours - 9) / 24 * 2 * np.pi)
+    weekly = np.where(weekdays >= 5, 1.3, 1.0)
+    surges = np.zeros(points)
+    for start in rng.integers(0, max(points - 12, 1), size=max(days // 3, 1)):
+        surges[start:start + 12] += rng.uniform(0.5, 1.5)
+
+    requests = np.maximum(10000 * daily * weekly * (1 + surges) * rng.normal(1, 0.05, points), 0)
+    capacity = np.clip(np.ceil(requests / requests_per_instance), 1, 10)
+    cpu = np.clip(100 * requests / (capacity * requests_per_instance * 1.25) + rng.normal(0, 3, points), 1, 100)
+    response_time = 0.05 + 0.002 * np.maximum(cpu - 60, 0) ** 1.5 / 10 + rng.normal(0, 0.005, points).clip(0)
+
+    return {
+        'RequestCount': [{'Timestamp': t, 'Sum': float(v)} for t, v in zip(timestamps, requests)],
+        'TargetResponseTime': [{'Timestamp': t, 'Average': float(v)} for t, v in zip(timestamps, response_time)],
+        'CPUUtilization': [{'Timestamp': t, 'Average': float(v)} for t, v in zip(timestamps, cpu)],
+        'GroupDesiredCapacity': [{'Timestamp': t, 'Average': float(v)} for t, v in zip(timestamps, capacity)]
+    }
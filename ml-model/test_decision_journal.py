@@ -0,0 +1,43 @@
+import contextlib
+import io
+import numpy as np
+from datetime import datetime, timezone
+from decision_journal import (DecisionJournal, LocalJournalSink, compact_journal, encode_segment,
+                              journal_days, read_journal)
+
+START = datetime(2026, 1, 5, 23, tzinfo=timezone.utc).timestamp()
+
+
+def write_records(sink, count):
+    journal = DecisionJournal(sink, batch_size=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(count):
+            journal.append(f"request-{i:04d}", features=[1000 + i, 0.05, 40, 23, 0], forecast=2,
+                           current_capacity=2, new_capacity=2, timestamp=START + i * 300)
+
+
+def test_compaction_merges_each_day_into_one_segment(tmp_path):
+    sink = LocalJournalSink(str(tmp_path))
+    write_records(sink, 24)  # 23:00 to 00:55, across two days
+    before = read_journal(sink)
+
+    days = journal_days(sink)
+    assert days == ['2026-01-05', '2026-01-06']
+    assert [compact_journal(sink, day) for day in days] == [12, 12]
+    assert [compact_journal(sink, day) for day in days] == [0, 0]
+
+    assert len(sink.list_keys()) == 2
+    after = read_journal(sink)
+    assert after.keys() == before.keys()
+    for name in before:
+        np.testing.assert_array_equal(after[name], before[name])
+
+
+def test_interrupted_compaction_does_not_duplicate_records(tmp_path):
+    sink = LocalJournalSink(str(tmp_path))
+    write_records(sink, 6)
+    before = read_journal(sink)
+
+    # The merged segment was written, the originals were not deleted yet
+    sink.write('journal/dt=2026-01-05/compacted-230000-6.npz', encode_segment(before))
+    assert len(read_journal(sink)['timestamp']) == 6
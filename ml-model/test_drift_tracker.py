@@ -0,0 +1,132 @@
+import contextlib
+import io
+from datetime import datetime, timedelta
+from unittest import mock
+import pytest
+from drift_tracker import DriftTracker, PERIOD_SECONDS, realized_capacity
+from local_harness import LocalHarness
+from model_registry import ModelRegistry
+
+
+def replay(tracker, forecast, metrics_for_period, method, periods=24, **params):
+    """Forecast `forecast` every period and score it the way track_prediction does"""
+    start = datetime(2026, 1, 5)
+    for i in range(periods):
+        now = start + timedelta(seconds=i * PERIOD_SECONDS)
+        if i:
+            previous = now - timedelta(seconds=PERIOD_SECONDS)
+            actuals = realized_capacity(method, metrics_for_period(previous), **params)
+            tracker.record_actuals(actuals, now=now, stat='Capacity')
+        tracker.record_forecast(now, forecast)
+    return tracker
+
+
+def shifted_metrics(timestamp, desired=4, requests=30000, cpu=100.0):
+    return {
+        'RequestCount': [{'Timestamp': timestamp, 'Sum': requests}],
+        'CPUUtilization': [{'Timestamp': timestamp, 'Average': cpu}],
+        'GroupDesiredCapacity': [{'Timestamp': timestamp, 'Average': desired}]
+    }
+
+
+@pytest.mark.parametrize('method, params', [
+    ('requests', {'requests_per_instance': 3000}),
+    ('cpu', {'target_cpu': 70})
+])
+def test_flat_forecast_under_a_demand_shift_drifts(method, params):
+    # Demand needs 10 instances, the stale model keeps forecasting (and setting) 4;
+    # saturated CPU only shows 6 of them, still well past the threshold
+    tracker = replay(DriftTracker(min_samples=12), 4, shifted_metrics, method, **params)
+    assert tracker.should_retrain()
+
+
+def test_desired_capacity_hides_a_demand_shift():
+    tracker = replay(DriftTracker(min_samples=12), 4, shifted_metrics, 'desired')
+    assert tracker.statistics()['mae'] == 0
+    assert not tracker.should_retrain()
+
+
+def test_saturated_max_does_not_retrain():
+    # Demand needs 13 instances, the forecast is already at the group's max of 10
+    metrics = lambda timestamp: shifted_metrics(timestamp, desired=10, requests=39000)
+    tracker = replay(DriftTracker(min_samples=12), 10, metrics, 'requests',
+                     requests_per_instance=3000, min_instances=1, max_instances=10)
+    assert tracker.statistics()['mae'] == 0
+    assert not tracker.should_retrain()
+
+
+def drifted_tracker(**kwargs):
+    return replay(DriftTracker(min_samples=12, **kwargs), 4, shifted_metrics, 'requests', requests_per_instance=3000)
+
+
+def test_retrain_cooldown():
+    tracker = drifted_tracker(cooldown=7200)
+    retrain_at = datetime(2026, 1, 5, 2)
+    tracker.record_retrain(False, now=retrain_at)
+    assert not tracker.should_retrain(now=retrain_at + timedelta(hours=1))
+    assert tracker.should_retrain(now=retrain_at + timedelta(hours=2))
+
+
+def test_no_retrain_after_one_that_did_not_help():
+    tracker = drifted_tracker(cooldown=0)
+    mae = tracker.statistics()['mae']
+    retrain_at = datetime(2026, 1, 5, 2)
+    tracker.record_retrain(True, now=retrain_at)
+    assert tracker.samples == 0
+
+    # The retrained model is off by as much as the old one for another window
+    for _ in range(24):
+        tracker._push(mae)
+    assert not tracker.should_retrain(now=retrain_at + timedelta(hours=3))
+    assert tracker.should_retrain(now=retrain_at + timedelta(days=1))
+
+    restored = DriftTracker.from_json(tracker.to_json(), min_samples=12, cooldown=0)
+    assert not restored.should_retrain(now=retrain_at + timedelta(hours=3))
+
+
+def test_unknown_realized_capacity():
+    with pytest.raises(ValueError):
+        realized_capacity('latency', {})
+
+
+def run_harness(demand_factor, periods=288):
+    harness = LocalHarness()
+    harness.seed_history(7)
+    with harness.installed(), contextlib.redirect_stdout(io.StringIO()):
+        from predictive_scaler import PredictiveScaler
+        scaler = PredictiveScaler()
+        scaler.retrain(hours_back=168)
+        if not scaler.auto_promote:
+            scaler.registry.promote(scaler.registry.list_versions()[-1], reason='trained')
+
+    demand = [requests * demand_factor for requests in harness.synthetic_demand(periods)]
+    harness.run(periods=periods, demand=demand)
+    return len(ModelRegistry(harness.s3, harness.bucket).list_versions())
+
+
+def test_demand_shift_triggers_retrain_end_to_end():
+    assert run_harness(2.5) > 1
+
+
+def test_steady_demand_does_not_retrain():
+    assert run_harness(1.0) == 1
+
+
+def test_drift_does_not_retrain_without_auto_promote(monkeypatch):
+    # The new version would never go live, so the drift and the retrain would repeat every hour
+    monkeypatch.setenv('MODEL_AUTO_PROMOTE', 'false')
+    assert run_harness(2.5) == 1
+
+
+def test_failed_retrain_does_not_stop_scaling():
+    harness = LocalHarness()
+    harness.seed_history(7)
+    with harness.installed(), contextlib.redirect_stdout(io.StringIO()):
+        from predictive_scaler import PredictiveScaler
+        PredictiveScaler().retrain(hours_back=168)
+
+    with mock.patch('predictive_scaler.PredictiveScaler.retrain', side_effect=RuntimeError("throttled")), \
+            mock.patch('drift_tracker.DriftTracker.should_retrain', return_value=True):
+        results = harness.run(periods=36)
+    assert all(r['status'] == 200 for r in results)
+    assert any(r['action'] == 'scaled' for r in results)
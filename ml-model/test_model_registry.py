@@ -0,0 +1,47 @@
+import numpy as np
+from decision_journal import to_columns
+from model_registry import shadow_report
+
+START = 1767225600  # 2026-01-01, a period boundary
+
+
+def journal(rows):
+    """Journal columns for (invocation offset in periods, request count, desired, live forecast, shadow forecast)"""
+    return to_columns([
+        {
+            'timestamp': START + i * 300 + 5,
+            'request_id': f"r{i}",
+            'features': [requests, 0.05, 50.0, 0, 3],
+            'features_period': START + (i - 1) * 300,
+            'forecast': live,
+            'current_capacity': desired,
+            'new_capacity': live,
+            'action': 'none',
+            'timings': {},
+            'shadow': {'candidate': {'forecast': shadow, 'predict_ms': 1.0}}
+        }
+        for i, requests, desired, live, shadow in rows
+    ])
+
+
+def test_forecasts_are_scored_against_realized_capacity_by_period():
+    # Period p needs p + 3 instances. The candidate forecasts each target period
+    # exactly, the live model keeps forecasting (and setting) 3. Invocation 3
+    # never ran, which shifts any pairing by row.
+    def needed(period):
+        return period + 3
+
+    columns = journal([(i, 3000 * needed(i - 1), 3, 3, needed(i + 1)) for i in (0, 1, 2, 4, 5, 6)])
+    report = shadow_report(columns, 'requests', requests_per_instance=3000, min_instances=1, max_instances=10)
+
+    # Only periods 1, 3 and 5 are both forecast and described by a later row
+    assert report['candidate']['scored'] == 3
+    assert report['candidate']['mae'] == 0
+    assert report['live']['mae'] == 3
+
+
+def test_realized_capacity_is_clamped_to_the_group():
+    columns = journal([(i, 60000, 10, 10, 8) for i in range(6)])
+    report = shadow_report(columns, 'requests', requests_per_instance=3000, min_instances=1, max_instances=10)
+    assert report['live']['mae'] == 0
+    assert np.isclose(report['candidate']['bias'], -2)
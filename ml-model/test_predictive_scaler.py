@@ -0,0 +1,31 @@
+import contextlib
+import io
+import numpy as np
+import pytest
+from local_harness import LocalHarness
+from synthetic_metrics import generate_metrics
+
+
+@pytest.mark.parametrize('engine, segmentation, source', [
+    ('random_forest', 'none', 'oob'),
+    ('random_forest', 'weekpart', 'holdout'),
+    ('ridge', 'none', 'holdout')
+])
+def test_forecast_margin_comes_from_unseen_rows(engine, segmentation, source):
+    harness = LocalHarness()
+    with harness.installed(), contextlib.redirect_stdout(io.StringIO()):
+        from predictive_scaler import PredictiveScaler
+        scaler = PredictiveScaler()
+        scaler.segmentation = segmentation
+        features, targets = scaler.prepare_training_data(
+            generate_metrics(days=7), 'requests', **scaler.realized_params()
+        )
+        assert scaler.train_model(features, targets, engine_name=engine)
+        metadata = scaler.registry.metadata(scaler.registry.list_versions()[-1])
+
+    in_sample = np.quantile(targets - scaler.predict(features), scaler.forecast_quantile)
+    assert metadata['margin_source'] == source
+    assert scaler.forecast_margin > 0
+    if engine == 'random_forest':
+        # Trees fit their own rows closely; the margin must not inherit that
+        assert scaler.forecast_margin > in_sample
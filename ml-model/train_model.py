@@ -1,3 +1,4 @@
+import os
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -11,11 +12,15 @@ def train_model_standalone():
     print("Initializing Predictive Scaler...")
     scaler = PredictiveScaler()
     
+    # Per-segment models (MODEL_SEGMENTATION) train across every core of this host
+    if 'TRAINING_WORKERS' not in os.environ:
+        scaler.training_workers = os.cpu_count() or 1
+    
     print("Collecting historical metrics (last 7 days)...")
     metrics = scaler.collect_metrics(hours_back=168)  # 7 days
     
     print("Preparing training data...")
-    features, targets = scaler.prepare_training_data(metrics)
+    features, targets = scaler.prepare_training_data(metrics, scaler.drift_actual, **scaler.realized_params())
     
     print(f"Training data shape: Features: {features.shape}, Targets: {targets.shape}")
     
@@ -31,7 +36,7 @@ def train_model_standalone():
         print("Model trained successfully!")
         
         # Simple validation
-        predictions = scaler.model.predict(scaler.scaler.transform(features))
+        predictions = scaler.predict(features)
         mse = np.mean((predictions - targets) ** 2)
         rmse = np.sqrt(mse)
         
@@ -43,7 +48,7 @@ def train_model_standalone():
         plt.plot(targets[:100], label='Actual', marker='o')
         plt.plot(predictions[:100], label='Predicted', marker='x')
         plt.xlabel('Time Period')
-        plt.ylabel('Desired Capacity')
+        plt.ylabel('Needed Capacity')
         plt.title('Actual vs Predicted Capacity (First 100 Points)')
         plt.legend()
         plt.grid(True)
@@ -172,7 +172,9 @@ resource "aws_iam_role_policy" "lambda_predictive_scaling" {
         Action = [
           "autoscaling:DescribeAutoScalingGroups",
           "autoscaling:SetDesiredCapacity",
-          "autoscaling:UpdateAutoScalingGroup"
+          "autoscaling:UpdateAutoScalingGroup",
+          "autoscaling:DescribeWarmPool",
+          "autoscaling:PutWarmPool"
         ]
         Resource = "*"
       },
@@ -217,6 +219,9 @@ resource "aws_lambda_function" "predictive_scaling" {
       SNS_TOPIC_ARN      = aws_sns_topic.scaling_events.arn
       MIN_INSTANCES      = var.min_size
       MAX_INSTANCES      = var.max_size
+      # ALBRequestCountPerTarget target (1000 per minute) over a 5 minute period,
+      # used to score forecasts against the capacity demand needed
+      REQUESTS_PER_INSTANCE = 5000
     }
   }
 